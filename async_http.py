@@ -0,0 +1,227 @@
+"""
+Asyncio HTTP backend for the plain-HTTP sources.
+
+One ``httpx.AsyncClient`` on a background event-loop thread serves the whole
+process. Connections stay alive between refreshes, HTTP/2 is negotiated
+when the ``h2`` package is installed (requests to one host then share a
+single connection), and host names are resolved once per ``DNS_TTL``
+instead of on every new connection.
+
+Blocking code (the scraper threads, Streamlit) uses the fetcher like a
+requests.Session:
+
+    fetcher = get_async_fetcher()
+    response = fetcher.get('https://cashchanger.co/singapore', timeout=10)
+    responses = fetcher.get_many(urls, concurrency=16)   # one thread, many pages
+
+Coroutines running on the fetcher's loop can ``await fetcher.aget(url)``.
+"""
+import asyncio
+import os
+import socket
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from http_client import ACCEPT_ENCODING, USER_AGENT
+from metrics import inc
+
+try:
+    import httpx
+    import httpcore
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+try:
+    import h2  # noqa: F401  (httpx negotiates HTTP/2 via ALPN when it is installed)
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+DNS_TTL = float(os.environ.get('DNS_TTL', '300'))
+MAX_CONNECTIONS = int(os.environ.get('HTTP_MAX_CONNECTIONS', '32'))
+KEEPALIVE_EXPIRY = 90
+
+
+def _is_ip(host: str) -> bool:
+    for family in (socket.AF_INET, socket.AF_INET6):
+        try:
+            socket.inet_pton(family, host)
+            return True
+        except OSError:
+            pass
+    return False
+
+
+if HTTPX_AVAILABLE:
+    class _CachingResolverBackend(httpcore.AsyncNetworkBackend):
+        """
+        Network backend that remembers getaddrinfo results for ``ttl``
+        seconds. Every resolved address is tried in order until one
+        connects; the one that did is tried first next time, and a host
+        none of whose addresses connect is resolved again. TLS still uses
+        the original host name for SNI and certificate checks, since
+        httpcore passes it to start_tls separately.
+        """
+
+        def __init__(self, ttl: float = DNS_TTL):
+            self._backend = httpcore.AnyIOBackend()
+            self._ttl = ttl
+            self._cache: Dict[Tuple[str, int], Tuple[List[str], float]] = {}
+
+        async def _lookup(self, host: str, port: int) -> List[str]:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+            return list(dict.fromkeys(info[4][0] for info in infos))
+
+        async def _resolve(self, host: str, port: int) -> List[str]:
+            if _is_ip(host):
+                return [host]
+            cached = self._cache.get((host, port))
+            now = time.monotonic()
+            if cached is not None and cached[1] > now:
+                inc('dns_cache_total', result='hit')
+                return cached[0]
+            inc('dns_cache_total', result='miss')
+            addresses = await self._lookup(host, port)
+            self._cache[(host, port)] = (addresses, now + self._ttl)
+            return addresses
+
+        async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+            addresses = await self._resolve(host, port)
+            error: Optional[Exception] = None
+            for address in addresses:
+                try:
+                    stream = await self._backend.connect_tcp(address, port, timeout=timeout,
+                                                             local_address=local_address,
+                                                             socket_options=socket_options)
+                except (OSError, httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                    error = e
+                    continue
+                if address != addresses[0]:
+                    cached = self._cache.get((host, port))
+                    if cached is not None and cached[0] is addresses:
+                        reordered = [address] + [a for a in addresses if a != address]
+                        self._cache[(host, port)] = (reordered, cached[1])
+                return stream
+            self._cache.pop((host, port), None)
+            raise error or httpcore.ConnectError(f'no addresses for {host}')
+
+        async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+            return await self._backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+        async def sleep(self, seconds):
+            await self._backend.sleep(seconds)
+
+
+class AsyncFetcher:
+    """
+    Pooled asyncio HTTP client with a blocking, requests-like facade.
+
+    ``get`` returns an ``httpx.Response`` with the body already read; the
+    time to response headers is stored in ``response.extensions['ttfb']``.
+    """
+
+    def __init__(self, max_connections: int = MAX_CONNECTIONS, http2: bool = HTTP2, dns_ttl: float = DNS_TTL):
+        if not HTTPX_AVAILABLE:
+            raise RuntimeError('httpx is not installed; use http_client.get_shared_session() instead')
+        self.max_connections = max_connections
+        self.http2 = http2
+        self.dns_ttl = dns_ttl
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional['httpx.AsyncClient'] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    # -- event loop ------------------------------------------------------
+
+    def _start(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=run, name='async-http', daemon=True)
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    def run(self, coro, timeout: Optional[float] = None):
+        """Run a coroutine on the fetcher's loop and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coro, self._start()).result(timeout)
+
+    def _get_client(self) -> 'httpx.AsyncClient':
+        # Only ever called on the fetcher's loop
+        if self._client is None:
+            transport = httpx.AsyncHTTPTransport(
+                http2=self.http2,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections,
+                                    keepalive_expiry=KEEPALIVE_EXPIRY),
+            )
+            pool = getattr(transport, '_pool', None)
+            if self.dns_ttl > 0 and hasattr(pool, '_network_backend'):
+                # httpx has no public hook for the resolver; swap httpcore's network backend
+                pool._network_backend = _CachingResolverBackend(self.dns_ttl)
+            self._client = httpx.AsyncClient(
+                transport=transport,
+                headers={'User-Agent': USER_AGENT, 'Accept-Encoding': ACCEPT_ENCODING},
+                follow_redirects=True,
+            )
+        return self._client
+
+    # -- requests ---------------------------------------------------------
+
+    async def aget(self, url: str, headers: Optional[dict] = None, timeout: float = 10) -> 'httpx.Response':
+        client = self._get_client()
+        started = time.perf_counter()
+        async with client.stream('GET', url, headers=headers, timeout=timeout) as response:
+            response.extensions = {**response.extensions, 'ttfb': time.perf_counter() - started}
+            await response.aread()
+        inc('http_requests_total', version=response.http_version)
+        return response
+
+    def get(self, url: str, headers: Optional[dict] = None, timeout: float = 10) -> 'httpx.Response':
+        """Blocking GET on the shared pool (drop-in for requests.Session.get in fetch_if_changed)"""
+        return self.run(self.aget(url, headers=headers, timeout=timeout))
+
+    def get_many(self, urls: Sequence[str], headers: Optional[dict] = None, timeout: float = 10,
+                 concurrency: int = 16) -> List[Union['httpx.Response', Exception]]:
+        """GET every URL concurrently from this one thread; failures are returned, not raised"""
+        async def fetch_all():
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def one(url):
+                async with semaphore:
+                    return await self.aget(url, headers=headers, timeout=timeout)
+            return await asyncio.gather(*(one(url) for url in urls), return_exceptions=True)
+        return self.run(fetch_all())
+
+    def close(self) -> None:
+        with self._lock:
+            loop, client = self._loop, self._client
+            self._loop = self._client = None
+        if loop is None:
+            return
+        if client is not None:
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop).result(10)
+        loop.call_soon_threadsafe(loop.stop)
+
+
+_fetcher_lock = threading.Lock()
+_fetcher: Optional[AsyncFetcher] = None
+
+
+def get_async_fetcher() -> AsyncFetcher:
+    """Process-wide fetcher, created on first use"""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = AsyncFetcher()
+        return _fetcher
@@ -0,0 +1,116 @@
+"""
+Micro-benchmark: THB cross rates and batch conversion.
+
+    python benchmarks/bench_calculator.py [--amounts 10000] [--repeat 20]
+
+Compares, on a synthetic board (CashChanger in SGD, Grand Superrich in
+THB with note bands):
+
+- the per-row cross-rate loop formerly in main.main() vs a full
+  CrossRateCalculator.update vs an update where one quote moved vs an
+  update with nothing changed
+- converting N (currency, amount) pairs one lookup at a time vs one
+  CrossRateCalculator.convert call
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from calculator import CrossRateCalculator  # noqa: E402
+from records import RateBatch, RateRecord  # noqa: E402
+
+CURRENCIES = ['USD', 'EUR', 'GBP', 'JPY', 'AUD', 'CAD', 'CHF', 'CNY', 'HKD', 'KRW', 'MYR', 'NZD', 'TWD', 'IDR']
+BANDS = ['100', '50-20', '10-1']
+QUOTES = {'CashChanger': 'SGD', 'Grand Superrich': 'THB'}
+
+
+def board(rng, bump: str = ''):
+    cashchanger = RateBatch.from_records(
+        RateRecord('CashChanger', c, rate + (c == bump) * 0.01, rate + (c == bump) * 0.01)
+        for c, rate in zip(CURRENCIES, rng.uniform(0.1, 2.0, len(CURRENCIES)))
+    )
+    superrich = [RateRecord('Grand Superrich', 'SGD', 25.1, 25.3, '100')]
+    for c in CURRENCIES:
+        for band, rate in zip(BANDS, rng.uniform(5, 45, len(BANDS))):
+            superrich.append(RateRecord('Grand Superrich', c, rate, rate * 1.01, band))
+    return {'CashChanger': cashchanger, 'Grand Superrich': RateBatch.from_records(superrich)}
+
+
+def legacy_cross_rates(results):
+    """The per-row multiplication main.main() used to do on every rerun"""
+    sgd = next((r.buy for r in results['Grand Superrich'] if r.currency == 'SGD'), None)
+    rows = []
+    for name, batch in results.items():
+        for record in batch:
+            rate = record.buy * sgd if QUOTES[name] == 'SGD' and sgd else record.buy
+            rows.append({'Codes': record.label, 'rates': rate})
+    return rows
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cross-rate calculator benchmark')
+    parser.add_argument('--amounts', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    first = board(np.random.default_rng(1))
+    moved = {**first, 'CashChanger': board(np.random.default_rng(1), bump='USD')['CashChanger']}
+
+    def full():
+        CrossRateCalculator(QUOTES).update(first)
+
+    calculator = CrossRateCalculator(QUOTES)
+    state = {'flip': False}
+
+    def one_moved():
+        state['flip'] = not state['flip']
+        calculator.update(moved if state['flip'] else first)
+
+    def unchanged():
+        calculator.update(first)
+
+    print(f"{'cross rates':<34} {'median ms':>10}")
+    for label, fn in (('legacy per-row loop', lambda: legacy_cross_rates(first)),
+                      ('calculator, full update', full),
+                      ('calculator, one quote moved', one_moved),
+                      ('calculator, nothing changed', unchanged)):
+        print(f"{label:<34} {timed(fn, args.repeat):>10.3f}")
+
+    calculator.update(first)
+    currencies = rng.choice(CURRENCIES, args.amounts)
+    amounts = rng.choice([5.0, 20.0, 100.0, 1000.0], args.amounts)
+    matrix = calculator.latest.matrix
+
+    def per_row():
+        return [matrix.best_for_amounts(c, [a], quote_currency='THB').total[0] for c, a in zip(currencies, amounts)]
+
+    def batch():
+        return calculator.convert(currencies, amounts).total
+
+    loop_total, batch_total = np.array(per_row()), batch()
+    assert np.allclose(loop_total, batch_total, equal_nan=True), 'per-row and batch conversions disagree'
+    print(f"\n{f'convert {args.amounts} amounts':<34} {'median ms':>10}")
+    print(f"{'per-row best_for_amounts':<34} {timed(per_row, max(1, args.repeat // 10)):>10.3f}")
+    print(f"{'calculator.convert':<34} {timed(batch, args.repeat):>10.3f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+Micro-benchmark: CashChanger page parsing, BeautifulSoup + regex scan
+(the original scrape_cashchanger logic) vs the single-pass CashChangerParser.
+
+    python benchmarks/bench_cashchanger_parse.py [--repeat 50]
+
+Reports mean parse time and tracemalloc peak for every fixture in fixtures/
+whose name starts with "cashchanger", and checks both parsers agree.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from cashchanger_parser import parse_cashchanger  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, 'fixtures')
+
+
+def legacy_parse(content: bytes):
+    """The original scrape_cashchanger parsing, kept verbatim for comparison"""
+    soup = BeautifulSoup(content, 'html.parser')
+    rates_data = []
+    money_changers = soup.find_all('div', class_=re.compile(r'rate|exchange|changer|currency', re.I))
+    tables = soup.find_all('table')
+    for table in tables:
+        rows = table.find_all('tr')
+        for row in rows:
+            cells = row.find_all(['td', 'th'])
+            if len(cells) >= 3:
+                cell_texts = [cell.get_text(strip=True) for cell in cells]
+                for i, cell_text in enumerate(cell_texts):
+                    currency_match = re.search(r'\b([A-Z]{3})\b', cell_text)
+                    if currency_match and i + 2 < len(cell_texts):
+                        currency = currency_match.group(1)
+                        if currency in ['USD', 'EUR', 'GBP', 'JPY', 'AUD', 'CAD', 'CHF', 'CNY', 'SGD']:
+                            try:
+                                buy_rate = float(re.findall(r'\d+\.\d+', cell_texts[i+1])[0])
+                                sell_rate = float(re.findall(r'\d+\.\d+', cell_texts[i+2])[0])
+                                rates_data.append({'Currency': currency, 'Buy Rate': buy_rate,
+                                                   'Sell Rate': sell_rate, 'Source': 'CashChanger'})
+                            except (IndexError, ValueError):
+                                continue
+    if not rates_data:
+        text_content = soup.get_text()
+        for currency, amount, sgd_rate in re.findall(r'([A-Z]{3})\s+(\d+)\s+=\s+SGD\s+([\d\.]+)', text_content):
+            rate_per_unit = float(sgd_rate) / float(amount)
+            rates_data.append({'Currency': currency, 'Buy Rate': rate_per_unit,
+                               'Sell Rate': rate_per_unit, 'Source': 'CashChanger'})
+        if rates_data:
+            df_temp = pd.DataFrame(rates_data)
+            df_temp = df_temp.drop_duplicates(subset=['Currency'], keep='last')
+            rates_data = df_temp.to_dict('records')
+    if rates_data:
+        return pd.DataFrame(rates_data).drop_duplicates(subset=['Currency']).to_dict('records')
+    return []
+
+
+def single_pass_parse(content: bytes):
+    return parse_cashchanger(content.decode('utf-8'))
+
+
+def measure(fn, content, repeat):
+    fn(content)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn(content)
+    elapsed = (time.perf_counter() - started) / repeat
+
+    tracemalloc.start()
+    fn(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'Fixture':<30} {'Parser':<10} {'Mean ms':>9} {'Peak KiB':>10} {'Rates':>6}")
+    print('-' * 70)
+    for name in sorted(os.listdir(FIXTURES)):
+        if not (name.startswith('cashchanger') and name.endswith('.html')):
+            continue
+        with open(os.path.join(FIXTURES, name), 'rb') as f:
+            content = f.read()
+
+        results = {}
+        for label, fn in (('legacy', legacy_parse), ('single', single_pass_parse)):
+            rates, elapsed, peak = measure(fn, content, args.repeat)
+            results[label] = rates
+            print(f"{name:<30} {label:<10} {elapsed * 1000:>9.2f} {peak / 1024:>10.0f} {len(rates):>6}")
+
+        legacy = {r['Currency']: (round(r['Buy Rate'], 8), round(r['Sell Rate'], 8)) for r in results['legacy']}
+        single = {r.currency: (round(r.buy, 8), round(r.sell, 8)) for r in results['single']}
+        if legacy != single:
+            print(f"  !! {name}: parsers disagree")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+"""
+Offline scrape benchmark. Points every source at the local stub server
+(benchmarks/stub_server.py) and reports, per scraper:
+
+- end-to-end latency (mean / p50 / p95) including the stub's network delay
+- parse throughput in pages/s for each parser on its synthetic fixture
+- tracemalloc peak and allocated blocks for one call
+- peak RSS of the benchmark process
+
+Every run is appended to benchmarks/results.jsonl with the current git
+commit and compared to the last run from a different commit with the same
+--latency and --jitter. Scrapes record history into a temporary
+RATE_HISTORY_DIR, never into history/.
+
+    python benchmarks/bench_scrape.py --iterations 20 --latency 50 --jitter 20
+    python benchmarks/bench_scrape.py --fail-on-regression   # exit 1 on >20% regressions
+"""
+import argparse
+import atexit
+import json
+import logging
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import replace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Stub rates must not end up in the real arbitrage history; set before history is imported
+os.environ['RATE_HISTORY_DIR'] = tempfile.mkdtemp(prefix='bench-history-')
+atexit.register(shutil.rmtree, os.environ['RATE_HISTORY_DIR'], ignore_errors=True)
+
+logging.getLogger('streamlit').setLevel(logging.ERROR)
+
+import async_http  # noqa: E402
+import http_client  # noqa: E402
+import sources  # noqa: E402
+import superrich  # noqa: E402
+from scraper import CurrencyRateScraper  # noqa: E402
+from stub_server import StubServer  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, 'fixtures')
+DEFAULT_RESULTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results.jsonl')
+
+# Metrics where a higher value is better; everything else is lower-is-better
+HIGHER_IS_BETTER = ('pages_per_s',)
+
+
+def _read(path, mode='rb'):
+    with open(path, mode) as f:
+        return f.read()
+
+
+def point_sources_at(stub: StubServer) -> None:
+    """Re-register the built-in sources against the stub, without rate limits"""
+    sources.register_source(replace(sources.get_source('CashChanger'),
+                                    url=stub.url('/cashchanger/singapore'), rate_limit=0))
+    sources.register_source(replace(sources.get_source('Grand Superrich'),
+                                    url=stub.url('/grandsuperrich/'), rate_limit=0))
+
+
+POLL_PAGES = 50
+
+
+def scenarios(stub: StubServer):
+    scraper = CurrencyRateScraper()
+    session = http_client.get_shared_session()
+    poll_urls = [stub.url('/cashchanger/singapore')] * POLL_PAGES
+
+    def render_via_http(url):
+        # Stands in for the browser: the stub already serves the rendered page
+        return session.get(url, timeout=10).text
+
+    cases = {
+        'scrape_cashchanger': scraper.scrape_cashchanger,
+        'scrape_grandsuperrich_sgd100': scraper.scrape_grandsuperrich_sgd100,
+        'scrape_superrich_thailand[api]': lambda: superrich.scrape_superrich_thailand(
+            url=stub.url('/superrich/'), mode='api', api_url=stub.url('/superrich/api/v1/rates')),
+        'scrape_superrich_thailand[fallback]': lambda: superrich.scrape_superrich_thailand(
+            url=stub.url('/superrich/'), mode='browser', retries=1, render_page=render_via_http),
+        'refresh[fetch_all]': lambda: scraper.fetch_all(
+            [s.name for s in sources.registered_sources() if s.on_page], use_cache=False),
+        f'poll_{POLL_PAGES}_pages[requests]': lambda: [session.get(url, timeout=10) for url in poll_urls],
+    }
+    if async_http.HTTPX_AVAILABLE:
+        fetcher = async_http.get_async_fetcher()
+        cases[f'poll_{POLL_PAGES}_pages[async]'] = lambda: fetcher.get_many(poll_urls, concurrency=16)
+    return cases
+
+
+def parsers():
+    cashchanger = _read(os.path.join(FIXTURES, 'cashchanger_singapore.html'))
+    grandsuperrich = _read(os.path.join(FIXTURES, 'grandsuperrich.html'))
+    superrich_html = _read(os.path.join(ROOT, 'sample.html'), 'r')
+    superrich_json = _read(os.path.join(FIXTURES, 'superrich_rates.json'))
+    return {
+        'parse_cashchanger_page': lambda: sources.parse_cashchanger_page(cashchanger),
+        'parse_grandsuperrich_page': lambda: sources.parse_grandsuperrich_page(grandsuperrich),
+        'superrich.parse_rate_html': lambda: superrich.parse_rate_html(superrich_html),
+        'superrich.parse_rate_payload': lambda: superrich.parse_rate_payload(json.loads(superrich_json)),
+    }
+
+
+def time_calls(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        # Force a real fetch + parse instead of the unchanged-page short-circuit
+        http_client.clear_page_states()
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def allocations(fn):
+    http_client.clear_page_states()
+    tracemalloc.start()
+    fn()
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sum(stat.count for stat in snapshot.statistics('filename'))
+    return peak, blocks
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def previous_run(path, commit, latency, jitter):
+    """Last run from another commit against a stub with the same latency and jitter"""
+    if not os.path.exists(path):
+        return None
+    previous = None
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            run = json.loads(line)
+            if (run.get('commit') != commit and run.get('latency_ms') == latency
+                    and run.get('jitter_ms') == jitter):
+                previous = run
+    return previous
+
+
+def regressions(current, previous, threshold):
+    found = []
+    for key, value in current.items():
+        old = previous.get(key)
+        if not old or not value:
+            continue
+        if key.endswith(HIGHER_IS_BETTER):
+            change = (old - value) / old
+        else:
+            change = (value - old) / old
+        if change > threshold:
+            found.append((key, old, value, change))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline scrape benchmark against synthetic fixtures')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=50, help='Stub server latency in ms')
+    parser.add_argument('--jitter', type=float, default=20, help='Stub server jitter in ms')
+    parser.add_argument('--parse-repeat', type=int, default=50)
+    parser.add_argument('--results', default=DEFAULT_RESULTS)
+    parser.add_argument('--threshold', type=float, default=0.2, help='Relative change counted as a regression')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args()
+
+    metrics = {}
+    with StubServer(latency_ms=args.latency, jitter_ms=args.jitter) as stub:
+        point_sources_at(stub)
+        print(f"{'Scenario':<40} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'peak KiB':>9} {'blocks':>8}")
+        print('-' * 90)
+        for name, fn in scenarios(stub).items():
+            fn()  # warm-up: connections, parse pool workers, imports
+            samples = time_calls(fn, args.iterations)
+            peak, blocks = allocations(fn)
+            p95 = statistics.quantiles(samples, n=20)[-1] if len(samples) > 1 else samples[0]
+            metrics.update({
+                f'{name}.mean_ms': statistics.fmean(samples),
+                f'{name}.p50_ms': statistics.median(samples),
+                f'{name}.p95_ms': p95,
+                f'{name}.peak_kib': peak / 1024,
+            })
+            print(f"{name:<40} {statistics.fmean(samples):>9.1f} {statistics.median(samples):>9.1f} "
+                  f"{p95:>9.1f} {peak / 1024:>9.0f} {blocks:>8}")
+
+    print()
+    print(f"{'Parser':<40} {'pages/s':>9} {'peak KiB':>9}")
+    print('-' * 60)
+    for name, fn in parsers().items():
+        fn()
+        started = time.perf_counter()
+        for _ in range(args.parse_repeat):
+            fn()
+        pages_per_s = args.parse_repeat / (time.perf_counter() - started)
+        peak, _ = allocations(fn)
+        metrics[f'{name}.pages_per_s'] = pages_per_s
+        metrics[f'{name}.peak_kib'] = peak / 1024
+        print(f"{name:<40} {pages_per_s:>9.1f} {peak / 1024:>9.0f}")
+
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        max_rss //= 1024
+    metrics['process.peak_rss_kib'] = max_rss
+    print(f"\nPeak RSS: {max_rss / 1024:.1f} MiB (parse pool workers not included)")
+
+    commit = git_commit()
+    previous = previous_run(args.results, commit, args.latency, args.jitter)
+    with open(args.results, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'commit': commit, 'timestamp': time.time(), 'latency_ms': args.latency,
+                            'jitter_ms': args.jitter, 'metrics': metrics}) + '\n')
+
+    if previous is None:
+        print(f"\nNo earlier run from another commit with --latency {args.latency:g} --jitter {args.jitter:g} "
+              f"in {args.results}; recorded baseline for {commit}")
+        return 0
+    found = regressions(metrics, previous['metrics'], args.threshold)
+    if not found:
+        print(f"\nNo regressions vs {previous['commit']} (threshold {args.threshold:.0%})")
+        return 0
+    print(f"\nRegressions vs {previous['commit']}:")
+    for key, old, new, change in found:
+        print(f"  {key}: {old:.2f} -> {new:.2f} ({change:+.0%})")
+    return 1 if args.fail_on_regression else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+Cold-start benchmark: import time and resident memory of every entry point,
+each measured in a fresh interpreter.
+
+    python benchmarks/bench_startup.py [--repeat 5]
+
+For each module it reports the median import time, the median wall time of
+the whole process (interpreter start included), the peak RSS and which
+heavy backends (Streamlit, Playwright, Selenium, bs4, pandas, Flask) the
+import pulled in.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = ('cli', 'scraper', 'superrich', 'daemon', 'push_server', 'main')
+HEAVY_MODULES = ('streamlit', 'playwright', 'selenium', 'bs4', 'pandas', 'flask')
+
+CHILD = """
+import importlib, json, resource, sys, time
+started = time.perf_counter()
+importlib.import_module(sys.argv[1])
+elapsed = time.perf_counter() - started
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == 'darwin':
+    rss //= 1024
+heavy = [m for m in sys.argv[2].split(',') if m in sys.modules]
+print(json.dumps({'import_ms': elapsed * 1000, 'rss_kib': rss, 'heavy': heavy}))
+"""
+
+
+def measure(module: str):
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', CHILD, module, ','.join(HEAVY_MODULES)],
+                            cwd=ROOT, capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()
+        return {'error': error[-1] if error else f'exit {result.returncode}'}
+    sample = json.loads(result.stdout.strip().splitlines()[-1])
+    sample['wall_ms'] = wall_ms
+    return sample
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import time and RSS of each entry point')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('modules', nargs='*', default=ENTRY_POINTS)
+    args = parser.parse_args()
+
+    print(f"{'Entry point':<14} {'import ms':>10} {'wall ms':>9} {'RSS MiB':>8}  heavy imports")
+    print('-' * 80)
+    for module in args.modules:
+        samples = [measure(module) for _ in range(args.repeat)]
+        failed = [s for s in samples if 'error' in s]
+        if failed:
+            print(f"{module:<14} failed: {failed[0]['error']}")
+            continue
+        import_ms = statistics.median(s['import_ms'] for s in samples)
+        wall_ms = statistics.median(s['wall_ms'] for s in samples)
+        rss_mib = max(s['rss_kib'] for s in samples) / 1024
+        heavy = ', '.join(samples[0]['heavy']) or '-'
+        print(f"{module:<14} {import_ms:>10.0f} {wall_ms:>9.0f} {rss_mib:>8.1f}  {heavy}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Local stand-in for the upstream sites, serving the synthetic fixtures with
+configurable latency and jitter.
+
+    python benchmarks/stub_server.py --port 8765 --latency 120 --jitter 40
+
+Routes:
+    /cashchanger/singapore      fixtures/cashchanger_singapore.html
+    /grandsuperrich/            fixtures/grandsuperrich.html
+    /superrich/                 sample.html (rendered Superrich page)
+    /superrich/api/v1/rates     fixtures/superrich_rates.json
+"""
+import argparse
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, 'fixtures')
+
+ROUTES = {
+    '/cashchanger/singapore': (os.path.join(FIXTURES, 'cashchanger_singapore.html'), 'text/html; charset=utf-8'),
+    '/grandsuperrich/': (os.path.join(FIXTURES, 'grandsuperrich.html'), 'text/html; charset=utf-8'),
+    '/superrich/': (os.path.join(ROOT, 'sample.html'), 'text/html; charset=utf-8'),
+    '/superrich/api/v1/rates': (os.path.join(FIXTURES, 'superrich_rates.json'), 'application/json'),
+}
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    # The default listen backlog (5) stalls bursts of concurrent connections for a SYN retry
+    request_queue_size = 128
+
+
+class StubServer:
+    """Threaded fixture server; use as a context manager or call start()/stop()"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency_ms: float = 0, jitter_ms: float = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.requests = 0
+        self._bodies = {}
+        for path, (filename, content_type) in ROUTES.items():
+            with open(filename, 'rb') as f:
+                self._bodies[path] = (f.read(), content_type)
+        self._server = _StubHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def url(self, path: str) -> str:
+        return self.base_url + path
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests += 1
+                delay = stub.latency_ms + random.uniform(-stub.jitter_ms, stub.jitter_ms)
+                if delay > 0:
+                    time.sleep(delay / 1000)
+                route = stub._bodies.get(self.path.split('?', 1)[0])
+                if route is None:
+                    self.send_error(404)
+                    return
+                body, content_type = route
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'StubServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='stub-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve synthetic rate pages locally')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0, help='Mean response latency in ms')
+    parser.add_argument('--jitter', type=float, default=0, help='Uniform +/- jitter in ms')
+    args = parser.parse_args()
+    with StubServer(args.host, args.port, args.latency, args.jitter) as stub:
+        print(f"Serving fixtures on {stub.base_url}")
+        for path in ROUTES:
+            print(f"  {stub.url(path)}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
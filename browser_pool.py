@@ -0,0 +1,191 @@
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+
+from metrics import inc, span
+
+# Never needed to read a rate table; aborted before they hit the network
+BLOCKED_RESOURCE_TYPES = frozenset({'image', 'font', 'media'})
+BLOCKED_HOSTS = re.compile(
+    r'^https?://[^/]*(google-analytics|googletagmanager|doubleclick|facebook|hotjar|clarity\.ms)\.',
+)
+
+# Screenshots and HTML dumps are only written when this is set
+DEBUG_DIR = os.environ.get('BROWSER_DEBUG_DIR')
+
+
+def _abort_non_essential(route) -> None:
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or BLOCKED_HOSTS.match(request.url):
+        inc('blocked_requests_total', type=request.resource_type)
+        route.abort()
+    else:
+        route.continue_()
+
+
+def dump_debug(page, name: str) -> None:
+    """Save a screenshot and the page HTML to DEBUG_DIR; does nothing unless it is set"""
+    if not DEBUG_DIR:
+        return
+    os.makedirs(DEBUG_DIR, exist_ok=True)
+    stem = os.path.join(DEBUG_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}")
+    page.screenshot(path=stem + '.png', full_page=True)
+    with open(stem + '.html', 'w', encoding='utf-8') as f:
+        f.write(page.content())
+    print(f"[BrowserPool] debug dump written to {stem}.png/.html")
+
+
+class _Worker(threading.Thread):
+    """
+    Owns one Playwright instance and one Chromium browser.
+
+    Playwright's sync API is bound to the thread that started it, so every
+    browser lives on its own worker thread and pages are driven from there.
+    """
+
+    def __init__(self, pool: 'BrowserPool', index: int):
+        super().__init__(name=f'browser-pool-{index}', daemon=True)
+        self.pool = pool
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self.navigations = 0
+        self.ready = threading.Event()
+
+    def launch(self) -> None:
+        with span('browser_launch'):
+            if self.playwright is None:
+                from playwright.sync_api import sync_playwright
+                self.playwright = sync_playwright().start()
+            self.browser = self.playwright.chromium.launch(headless=self.pool.headless)
+            self.context = self.browser.new_context(**self.pool.context_options)
+            if self.pool.block_resources:
+                self.context.route('**/*', _abort_non_essential)
+        inc('browser_launches_total')
+        self.navigations = 0
+
+    def close_browser(self) -> None:
+        try:
+            if self.browser is not None:
+                self.browser.close()
+        except Exception:
+            pass
+        self.browser = None
+        self.context = None
+
+    def healthy(self) -> bool:
+        return self.browser is not None and self.browser.is_connected()
+
+    def run(self) -> None:
+        try:
+            self.launch()
+        except Exception as e:
+            print(f"[BrowserPool] {self.name}: warm-up failed: {e}")
+        finally:
+            self.ready.set()
+
+        while True:
+            job = self.pool._jobs.get()
+            if job is None:
+                break
+            fn, future = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                if not self.healthy() or self.navigations >= self.pool.max_navigations:
+                    # Recycle after N navigations, or relaunch after a crash
+                    self.close_browser()
+                    self.launch()
+                page = self.context.new_page()
+                self.navigations += 1
+                try:
+                    future.set_result(fn(page))
+                finally:
+                    try:
+                        page.close()
+                    except Exception:
+                        pass
+            except Exception as e:
+                future.set_exception(e)
+                if not self.healthy():
+                    print(f"[BrowserPool] {self.name}: browser crashed, relaunching on next job")
+                    self.close_browser()
+
+        self.close_browser()
+        if self.playwright is not None:
+            self.playwright.stop()
+
+
+class BrowserPool:
+    """
+    Long-lived pool of headless Chromium browsers.
+
+    ``size`` caps how many pages are open at once (one per worker). Each
+    browser is recycled after ``max_navigations`` pages and relaunched if it
+    disconnects, so a scrape costs a page navigation instead of a launch.
+    With ``block_resources`` (default) images, fonts, media and analytics
+    requests are aborted for every page.
+    """
+
+    def __init__(self, size: int = 2, max_navigations: int = 50, headless: bool = True,
+                 context_options: Optional[dict] = None, block_resources: bool = True):
+        self.size = size
+        self.max_navigations = max_navigations
+        self.headless = headless
+        self.block_resources = block_resources
+        self.context_options = context_options or {}
+        self._jobs: queue.Queue = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+
+    def start(self, wait: bool = True) -> 'BrowserPool':
+        """Launch the browsers now instead of on the first scrape"""
+        with self._lock:
+            if not self._workers:
+                self._workers = [_Worker(self, i) for i in range(self.size)]
+                for worker in self._workers:
+                    worker.start()
+        if wait:
+            for worker in self._workers:
+                worker.ready.wait()
+        return self
+
+    def submit(self, fn: Callable[[Any], Any]) -> Future:
+        """Run ``fn(page)`` on a pooled page; the page is closed afterwards"""
+        self.start(wait=False)
+        future: Future = Future()
+        self._jobs.put((fn, future))
+        return future
+
+    def run(self, fn: Callable[[Any], Any], timeout: Optional[float] = None) -> Any:
+        return self.submit(fn).result(timeout=timeout)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for _ in workers:
+            self._jobs.put(None)
+        for worker in workers:
+            worker.join(timeout=10)
+
+
+_pool_lock = threading.Lock()
+_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool() -> BrowserPool:
+    """Process-wide browser pool, created on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool()
+        return _pool
+
+
+def warm_browser_pool() -> BrowserPool:
+    """Start the shared pool's browsers ahead of the first scrape"""
+    return get_browser_pool().start()
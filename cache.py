@@ -0,0 +1,144 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from metrics import inc
+
+
+def _has_data(value) -> bool:
+    """
+    Failed scrapes come back as None, an empty DataFrame or a stale fallback
+    (attrs['stale']); never cache those
+    """
+    if value is None or getattr(value, 'empty', False):
+        return False
+    return not getattr(value, 'attrs', {}).get('stale')
+
+
+class _Entry:
+    __slots__ = ('value', 'stored_at')
+
+    def __init__(self, value, stored_at: float):
+        self.value = value
+        self.stored_at = stored_at
+
+
+class _Flight:
+    """One upstream load of a key; callers that arrive while it runs share its outcome"""
+
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class RateCache:
+    """
+    Process-wide TTL cache for scraped rates.
+
+    - Fresh entries (younger than the source TTL) are returned directly.
+    - Stale entries (up to ``max_stale`` seconds past the TTL) are returned
+      immediately while a single background thread refreshes them.
+    - Concurrent misses for the same key share one upstream call
+      (singleflight): the first caller loads, everybody else waits for it
+      and gets the same result, or the same exception if the load failed.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, default_ttl: float = 60,
+                 max_stale: float = 600, clock: Callable[[], float] = time.monotonic):
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.max_stale = max_stale
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _Entry] = {}
+        self._inflight: Dict[str, _Flight] = {}
+
+    def ttl_for(self, key: str) -> float:
+        return self.ttls.get(key, self.default_ttl)
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Return the cached value for ``key``, calling ``loader`` only when needed"""
+        with self._lock:
+            entry = self._entries.get(key)
+            now = self._clock()
+            age = now - entry.stored_at if entry else None
+            ttl = self.ttl_for(key)
+
+            if entry and age < ttl:
+                inc('cache_requests_total', source=key, result='hit')
+                return entry.value
+
+            if entry and age < ttl + self.max_stale:
+                if key not in self._inflight:
+                    flight = self._inflight[key] = _Flight()
+                    threading.Thread(
+                        target=self._refresh, args=(key, loader, flight),
+                        name=f'rate-cache-refresh-{key}', daemon=True,
+                    ).start()
+                inc('cache_requests_total', source=key, result='stale')
+                return entry.value
+
+            flight = self._inflight.get(key)
+            if flight is None:
+                flight = self._inflight[key] = _Flight()
+                inc('cache_requests_total', source=key, result='miss')
+                leader = True
+            else:
+                inc('cache_requests_total', source=key, result='shared')
+                leader = False
+
+        if leader:
+            return self._load(key, loader, flight)
+        # Someone else is already loading this key: take their result, even a failed one,
+        # rather than calling upstream again
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def _load(self, key: str, loader: Callable[[], Any], flight: _Flight) -> Any:
+        try:
+            flight.value = loader()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if _has_data(flight.value):
+                    self._entries[key] = _Entry(flight.value, self._clock())
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+            flight.done.set()
+        return flight.value
+
+    def _refresh(self, key: str, loader: Callable[[], Any], flight: _Flight) -> None:
+        try:
+            self._load(key, loader, flight)
+        except Exception as e:
+            print(f"[RateCache] background refresh of {key} failed: {e}")
+
+    def peek(self, key: str) -> Optional[Any]:
+        """Last stored value for ``key`` regardless of age, without loading"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.value if entry else None
+
+    def age(self, key: str) -> Optional[float]:
+        with self._lock:
+            entry = self._entries.get(key)
+            return self._clock() - entry.stored_at if entry else None
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+# Module-level, so every Streamlit session in this process shares it.
+# Per-source TTLs are filled in by sources.register_source().
+rate_cache = RateCache()
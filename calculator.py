@@ -0,0 +1,275 @@
+"""
+Cross-rate calculator: every quote expressed in THB.
+
+THB-quoted sources (Grand Superrich, Superrich) are used as they are.
+SGD-quoted sources (CashChanger) are multiplied by the bridge rate, the
+Grand Superrich SGD 100 buy rate. The calculator keeps the derived rates of
+the previous update. An unchanged source costs an identity check, and a
+changed one only recomputes the rows whose buy/sell rate (or the bridge
+rate) moved:
+
+    calculator = CrossRateCalculator()
+    cross = calculator.update(results)        # {source name: RateBatch}
+    cross.to_frame()                          # source columns + THB Buy / THB Sell
+    cross.changed                             # (source, currency, denomination) recomputed
+
+    best = calculator.convert(['USD', 'EUR', 'USD'], [100, 50, 20])
+    best.total                                # THB for each amount, best source per row
+
+Nothing here imports Streamlit or a fetch backend, so a quoting service can
+feed it snapshots (``SnapshotStore.read_all()``) directly.
+"""
+import threading
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from metrics import inc
+from rate_matrix import BUY, BestRates, RateMatrix
+from records import RateBatch, as_batch
+
+BRIDGE_SOURCE = 'Grand Superrich'
+BRIDGE_CURRENCY = 'SGD'
+BRIDGE_DENOMINATION = '100'
+TARGET_CURRENCY = 'THB'
+
+Key = Tuple[str, str, str]
+
+
+def _same(a: float, b: float) -> bool:
+    return a == b or (np.isnan(a) and np.isnan(b))
+
+
+class _SourceState:
+    """Inputs and derived rates of one source as of the last update"""
+
+    __slots__ = ('batch', 'multiplier', 'buy', 'sell', 'index')
+
+    def __init__(self, batch: RateBatch, multiplier: float, buy: np.ndarray, sell: np.ndarray):
+        self.batch = batch
+        self.multiplier = multiplier
+        self.buy = buy
+        self.sell = sell
+        self.index = {key: i for i, key in enumerate(zip(batch.source, batch.currency, batch.denomination))}
+
+    def same_inputs(self, batch: RateBatch) -> bool:
+        # Cache hits and "unchanged" conditional GETs share the previous batch's arrays
+        b = self.batch
+        return all(getattr(batch, name) is getattr(b, name)
+                   for name in ('source', 'currency', 'denomination', 'buy', 'sell'))
+
+
+class CrossRates:
+    """
+    One update's result: the input quotes (``batch``) with THB buy/sell
+    rates per row. ``changed`` lists the rows recomputed by this update.
+    """
+
+    def __init__(self, batch: RateBatch, buy: np.ndarray, sell: np.ndarray, bridge_rate: float,
+                 changed: List[Key], target: str = TARGET_CURRENCY):
+        self.batch = batch
+        self.buy = buy
+        self.sell = sell
+        self.bridge_rate = bridge_rate
+        self.changed = changed
+        self.target = target
+        self._matrix: Optional[RateMatrix] = None
+
+    def __len__(self) -> int:
+        return len(self.batch)
+
+    @property
+    def matrix(self) -> RateMatrix:
+        """RateMatrix over the THB cross rates (every row quoted in the target currency); built once"""
+        if self._matrix is None:
+            b = self.batch
+            cross = RateBatch._wrap(b.source, b.currency, b.denomination, self.buy, self.sell)
+            self._matrix = RateMatrix(cross, {name: self.target for name in set(b.source.tolist())})
+        return self._matrix
+
+    def rate(self, source: str, currency: str, denomination: Optional[str] = None, side: str = BUY) -> float:
+        """THB per unit for one quote, NaN if there is none"""
+        return self.matrix.rate(source, currency, denomination, side)
+
+    def to_frame(self):
+        """Display DataFrame of the input quotes plus THB Buy / THB Sell"""
+        df = self.batch.to_frame()
+        df[f'{self.target} Buy'] = self.buy
+        df[f'{self.target} Sell'] = self.sell
+        return df
+
+
+class CrossRateCalculator:
+    """
+    Memoized THB cross rates over successive snapshots of the sources.
+
+    ``quote_currencies`` maps a source to the currency it quotes in; it
+    defaults to the source registry. Updates are serialized, so one
+    calculator can be shared between Streamlit sessions or request threads.
+    """
+
+    def __init__(self, quote_currencies: Optional[Mapping[str, str]] = None,
+                 bridge_source: str = BRIDGE_SOURCE, bridge_currency: str = BRIDGE_CURRENCY,
+                 bridge_denomination: str = BRIDGE_DENOMINATION, target: str = TARGET_CURRENCY):
+        if quote_currencies is None:
+            from sources import registered_sources
+            quote_currencies = {s.name: s.quote_currency for s in registered_sources()}
+        self.quote_currencies = dict(quote_currencies)
+        self.bridge_source = bridge_source
+        self.bridge_currency = bridge_currency
+        self.bridge_denomination = bridge_denomination
+        self.target = target
+        self._lock = threading.Lock()
+        self._states: Dict[str, _SourceState] = {}
+        self._latest: Optional[CrossRates] = None
+
+    # -- inputs ------------------------------------------------------------
+
+    def bridge_rate(self, batch: Optional[RateBatch]) -> float:
+        """
+        THB per bridge-currency unit from the bridge source: its
+        ``bridge_denomination`` note, else its first quote for the currency.
+        """
+        if batch is None or batch.empty:
+            return np.nan
+        rows = np.flatnonzero(batch.currency == self.bridge_currency)
+        if not len(rows):
+            return np.nan
+        preferred = rows[batch.denomination[rows] == self.bridge_denomination]
+        return float(batch.buy[preferred[0] if len(preferred) else rows[0]])
+
+    def _multiplier(self, name: str, bridge: float) -> float:
+        quote = self.quote_currencies.get(name, self.target)
+        if quote == self.target:
+            return 1.0
+        if quote == self.bridge_currency:
+            return bridge
+        return np.nan
+
+    def _recompute(self, name: str, batch: RateBatch, multiplier: float,
+                   changed: List[Key]) -> _SourceState:
+        """Derived rates for one source, reusing rows whose inputs match the previous update"""
+        previous = self._states.get(name)
+        n = len(batch)
+        dirty = np.ones(n, dtype=bool)
+        buy, sell = np.empty(n), np.empty(n)
+        if previous is not None and _same(previous.multiplier, multiplier):
+            old = np.fromiter((previous.index.get(key, -1) for key in
+                               zip(batch.source, batch.currency, batch.denomination)), dtype=np.intp, count=n)
+            known = old >= 0
+            j = old[known]
+            pb, ps = previous.batch.buy[j], previous.batch.sell[j]
+            nb, ns = batch.buy[known], batch.sell[known]
+            same = (((pb == nb) | (np.isnan(pb) & np.isnan(nb)))
+                    & ((ps == ns) | (np.isnan(ps) & np.isnan(ns))))
+            reuse = np.flatnonzero(known)[same]
+            buy[reuse], sell[reuse] = previous.buy[old[reuse]], previous.sell[old[reuse]]
+            dirty[reuse] = False
+
+        buy[dirty] = batch.buy[dirty] * multiplier
+        sell[dirty] = batch.sell[dirty] * multiplier
+        rows = np.flatnonzero(dirty)
+        changed.extend(zip(batch.source[rows], batch.currency[rows], batch.denomination[rows]))
+        inc('cross_rates_computed_total', len(rows), source=name)
+        inc('cross_rates_reused_total', n - len(rows), source=name)
+        return _SourceState(batch, multiplier, buy, sell)
+
+    def update(self, results: Mapping[str, RateBatch]) -> CrossRates:
+        """
+        Cross rates for the latest ``{source name: batch}`` results (DataFrames
+        are accepted too). When no source's inputs moved, the result shares
+        the previous update's arrays (and matrix) with an empty ``changed``.
+        """
+        batches = {name: as_batch(value) for name, value in results.items()}
+        batches = {name: batch for name, batch in batches.items() if not batch.empty}
+        with self._lock:
+            bridge = self.bridge_rate(batches.get(self.bridge_source))
+            changed: List[Key] = []
+            states = {}
+            for name, batch in batches.items():
+                multiplier = self._multiplier(name, bridge)
+                state = self._states.get(name)
+                if state is not None and state.same_inputs(batch) and _same(state.multiplier, multiplier):
+                    inc('cross_rates_reused_total', len(batch), source=name)
+                    states[name] = state
+                else:
+                    states[name] = self._recompute(name, batch, multiplier, changed)
+
+            latest = self._latest
+            if (latest is not None and not changed and states.keys() == self._states.keys()
+                    and all(states[name] is self._states[name] for name in states)):
+                self._latest = CrossRates(latest.batch, latest.buy, latest.sell, latest.bridge_rate, [], self.target)
+                self._latest._matrix = latest._matrix
+                return self._latest
+            self._states = states
+
+            ordered = list(states.values())
+            batch = RateBatch.concat(s.batch for s in ordered)
+            buy = np.concatenate([s.buy for s in ordered]) if ordered else np.empty(0)
+            sell = np.concatenate([s.sell for s in ordered]) if ordered else np.empty(0)
+            self._latest = CrossRates(batch, buy, sell, bridge, changed, self.target)
+            return self._latest
+
+    def update_batches(self, *batches: RateBatch) -> CrossRates:
+        """``update`` for batches without names; rows are keyed by their source column"""
+        results = {}
+        for value in batches:
+            batch = as_batch(value)
+            if batch.empty:
+                continue
+            names = set(batch.source.tolist())
+            if len(names) == 1:
+                results[str(batch.source[0])] = batch
+                continue
+            for name in names:
+                rows = np.flatnonzero(batch.source == name)
+                results[name] = RateBatch._wrap(batch.source[rows], batch.currency[rows], batch.denomination[rows],
+                                                batch.buy[rows], batch.sell[rows], batch.attrs)
+        return self.update(results)
+
+    # -- queries -------------------------------------------------------------
+
+    @property
+    def latest(self) -> Optional[CrossRates]:
+        return self._latest
+
+    def convert(self, currencies: Sequence[str], amounts, side: str = BUY) -> BestRates:
+        """
+        Vectorized conversion of many (currency, amount) pairs into THB at the
+        best source for each: ``side=BUY`` is what a changer pays for your
+        foreign cash, ``side=SELL`` what it charges. Note denominations apply
+        as in ``RateMatrix.best_for_amounts``; rows without a quote are NaN.
+        """
+        currencies = np.asarray(currencies, dtype=object).ravel()
+        amounts = np.asarray(amounts, dtype=np.float64).ravel()
+        if amounts.size == 1 and currencies.size > 1:
+            amounts = np.full(currencies.size, amounts[0])
+        if len(currencies) != len(amounts):
+            raise ValueError('currencies and amounts must have the same length')
+
+        n = len(amounts)
+        rate = np.full(n, np.nan)
+        source = np.full(n, '', dtype=object)
+        denomination = np.full(n, '', dtype=object)
+        latest = self._latest
+        if latest is not None and n:
+            codes, inverse = np.unique(currencies.astype(str), return_inverse=True)
+            order = np.argsort(inverse, kind='stable')
+            groups = np.split(order, np.cumsum(np.bincount(inverse, minlength=len(codes)))[:-1])
+            for code, rows in zip(codes, groups):
+                best = latest.matrix.best_for_amounts(code, amounts[rows], side, quote_currency=self.target)
+                rate[rows], source[rows], denomination[rows] = best.rate, best.source, best.denomination
+        return BestRates(amounts, rate, amounts * rate, source, denomination)
+
+
+_calculator_lock = threading.Lock()
+_calculator: Optional[CrossRateCalculator] = None
+
+
+def get_calculator() -> CrossRateCalculator:
+    """Process-wide calculator over the registered sources, created on first use"""
+    global _calculator
+    with _calculator_lock:
+        if _calculator is None:
+            _calculator = CrossRateCalculator()
+        return _calculator
@@ -0,0 +1,104 @@
+import re
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List
+
+from records import RateBatch, RateRecord
+
+CASHCHANGER_CURRENCIES = frozenset(['USD', 'EUR', 'GBP', 'JPY', 'AUD', 'CAD', 'CHF', 'CNY', 'SGD'])
+
+CURRENCY_CODE = re.compile(r'\b([A-Z]{3})\b')
+DECIMAL = re.compile(r'\d+\.\d+')
+# CashChanger listing text: "CURRENCY AMOUNT = SGD RATE", e.g. "USD 1 = SGD 1.282", "JPY 1000 = SGD 8.715"
+SGD_QUOTE = re.compile(r'([A-Z]{3})\s+(\d+)\s+=\s+SGD\s+([\d\.]+)')
+
+_SKIP_TAGS = frozenset(['script', 'style', 'template'])
+
+
+class CashChangerParser(HTMLParser):
+    """
+    Single-pass extractor for the CashChanger landing page.
+
+    Table rows are inspected as soon as they close, keeping the first quote
+    per tracked currency. Page text is kept only for the "USD 1 = SGD 1.282"
+    fallback used when the page has no rate table.
+    """
+
+    def __init__(self, currencies: Iterable[str] = CASHCHANGER_CURRENCIES):
+        super().__init__(convert_charrefs=True)
+        self.currencies = frozenset(currencies)
+        self.table_rates: Dict[str, RateRecord] = {}
+        self._text: List[str] = []
+        self._skip_depth = 0
+        self._row = None
+        self._cell = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == 'tr':
+            self._row = []
+        elif tag in ('td', 'th') and self._row is not None:
+            self._cell = []
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self._skip_depth = max(self._skip_depth - 1, 0)
+        elif tag in ('td', 'th'):
+            if self._cell is not None and self._row is not None:
+                self._row.append(''.join(self._cell))
+            self._cell = None
+        elif tag == 'tr':
+            if self._row is not None and len(self._row) >= 3:
+                self._consume_row(self._row)
+            self._row = None
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        self._text.append(data)
+        if self._cell is not None:
+            stripped = data.strip()
+            if stripped:
+                self._cell.append(stripped)
+
+    def _consume_row(self, cells: List[str]) -> None:
+        for i in range(len(cells) - 2):
+            currency_match = CURRENCY_CODE.search(cells[i])
+            if not currency_match:
+                continue
+            currency = currency_match.group(1)
+            if currency not in self.currencies or currency in self.table_rates:
+                continue
+            buy = DECIMAL.search(cells[i + 1])
+            sell = DECIMAL.search(cells[i + 2])
+            if buy and sell:
+                self.table_rates[currency] = RateRecord(
+                    'CashChanger', currency, float(buy.group()), float(sell.group())
+                )
+
+    def text_rates(self) -> List[RateRecord]:
+        """Quotes from the page text, keeping the last one seen per currency"""
+        rates: Dict[str, RateRecord] = {}
+        for currency, amount, sgd_rate in SGD_QUOTE.findall(''.join(self._text)):
+            try:
+                # Convert to rate per 1 unit of foreign currency (actual rate)
+                rate_per_unit = float(sgd_rate) / float(amount)
+            except (ValueError, ZeroDivisionError):
+                continue
+            rates.pop(currency, None)
+            rates[currency] = RateRecord('CashChanger', currency, rate_per_unit, rate_per_unit)
+        return list(rates.values())
+
+    def rates(self) -> RateBatch:
+        """Table quotes if the page had any, otherwise the text quotes"""
+        if self.table_rates:
+            return RateBatch.from_records(self.table_rates.values())
+        return RateBatch.from_records(self.text_rates())
+
+
+def parse_cashchanger(text: str) -> RateBatch:
+    """Parse the decoded landing page"""
+    parser = CashChangerParser()
+    parser.feed(text)
+    parser.close()
+    return parser.rates()
@@ -0,0 +1,112 @@
+import random
+import threading
+import time
+from typing import Any, Callable, Dict
+
+from metrics import inc
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Exponential backoff with full jitter: uniform(0, min(cap, base * 2**attempt))"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream source whose circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Per-source circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls fail immediately. Once the (jittered, exponentially growing) open
+    period has passed, a single half-open probe is let through: success
+    closes the circuit, failure re-opens it for twice as long.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, base_open: float = 30.0,
+                 max_open: float = 15 * 60, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_open = base_open
+        self.max_open = max_open
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now; claims the probe slot when half-open"""
+        with self._lock:
+            if self.state == OPEN and self._clock() >= self.open_until:
+                self.state = HALF_OPEN
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != CLOSED:
+                print(f"[circuit] {self.name}: closed")
+            self.state = CLOSED
+            self.failures = 0
+            self.trips = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                open_for = min(self.base_open * (2 ** self.trips), self.max_open)
+                open_for *= random.uniform(0.8, 1.2)
+                self.state = OPEN
+                self.open_until = self._clock() + open_for
+                self.trips += 1
+                inc('circuit_trips_total', source=self.name)
+                print(f"[circuit] {self.name}: open for {open_for:.0f}s after {self.failures} failures")
+            self._probing = False
+
+    def call(self, fn: Callable[[], Any], is_failure: Callable[[Any], bool] = lambda result: False) -> Any:
+        """Run ``fn`` through the breaker; raises CircuitOpenError without calling it when open"""
+        if not self.allow():
+            inc('circuit_short_circuits_total', source=self.name)
+            raise CircuitOpenError(f"{self.name}: circuit open")
+        try:
+            result = fn()
+        except Exception:
+            self.record_failure()
+            raise
+        if is_failure(result):
+            self.record_failure()
+        else:
+            self.record_success()
+        return result
+
+
+_breakers_lock = threading.Lock()
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str, **options) -> CircuitBreaker:
+    """Process-wide breaker for ``name``; ``options`` only apply on first use"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name, **options)
+        return breaker
+
+
+def breaker_states() -> Dict[str, str]:
+    with _breakers_lock:
+        return {name: breaker.state for name, breaker in _breakers.items()}
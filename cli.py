@@ -0,0 +1,123 @@
+"""
+Command-line access to the rate sources, without Streamlit.
+
+    python -m cli fetch                          # every on-page source, as a table
+    python -m cli fetch --sources CashChanger --json
+    python -m cli best USD 100 20 5              # best THB buy rate per amount
+    python -m cli board                          # crawl CashChanger: best changer per currency
+    python -m cli sources                        # list registered sources
+
+Only the backends the selected sources need are imported: HTTP sources
+never load Playwright, and nothing here loads Streamlit.
+"""
+import argparse
+import sys
+
+
+def fetch(names=None, as_json=False) -> int:
+    from scraper import CurrencyRateScraper
+    from sources import registered_sources
+
+    scraper = CurrencyRateScraper()
+    names = names or [source.name for source in registered_sources() if source.on_page]
+    # One-shot process: nothing to share through the TTL cache
+    results = scraper.fetch_all(names, use_cache=False)
+    combined = scraper.combine_data(*results.values())
+    if combined.empty:
+        print("No rates fetched", file=sys.stderr)
+        return 1
+
+    columns = [c for c in ('Currency', 'Source', 'Buy Rate', 'Sell Rate', 'THB Buy', 'THB Sell')
+               if c in combined.columns]
+    if as_json:
+        print(combined[columns].to_json(orient='records', force_ascii=False))
+    else:
+        print(combined[columns].to_string(index=False))
+    return 0
+
+
+def best(currency, amounts, names=None, side='buy', quote_currency='THB') -> int:
+    from scraper import CurrencyRateScraper
+    from sources import registered_sources
+
+    scraper = CurrencyRateScraper()
+    names = names or [source.name for source in registered_sources() if source.quote_currency == quote_currency]
+    matrix = scraper.rate_matrix(scraper.fetch_all(names, use_cache=False))
+    result = matrix.best_for_amounts(currency, amounts, side=side, quote_currency=quote_currency)
+    print(f"{'Amount':>10} {'Rate':>10} {quote_currency + ' total':>14}  Source (denomination)")
+    for amount, rate, total, source, denomination in zip(
+            result.amount, result.rate, result.total, result.source, result.denomination):
+        where = f"{source} ({denomination})" if denomination else source or 'no quote'
+        print(f"{amount:>10g} {rate:>10.4f} {total:>14.2f}  {where}")
+    return 0 if any(result.source) else 1
+
+
+def board(max_pages=200, concurrency=8, full=False) -> int:
+    from crawler import CashChangerCrawler
+
+    rate_board = CashChangerCrawler(max_pages=max_pages, concurrency=concurrency).crawl()
+    if not len(rate_board):
+        print("No rates crawled", file=sys.stderr)
+        return 1
+    print(f"{len(rate_board.changers())} changers x {len(rate_board.currencies())} currencies "
+          f"from {rate_board.pages} pages ({rate_board.errors} errors)", file=sys.stderr)
+    if full:
+        print(rate_board.to_frame().to_string(float_format=lambda v: f'{v:.4f}'))
+        return 0
+    print(f"{'Currency':<9} {'SGD per unit':>12}  Cheapest changer")
+    for currency, record in rate_board.best_changers().items():
+        print(f"{currency:<9} {record.sell:>12.4f}  {record.source}")
+    return 0
+
+
+def list_sources() -> int:
+    from sources import registered_sources
+
+    for source in registered_sources():
+        print(f"{source.name:<22} {source.mode:<8} {source.quote_currency:<4} "
+              f"every {source.poll_interval:g}s  {source.url}")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m cli', description='Fetch exchange rates from the command line')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    fetch_parser = commands.add_parser('fetch', help='Fetch and print current rates')
+    fetch_parser.add_argument('--sources', nargs='*', help='Source names (default: the sources shown on the page)')
+    fetch_parser.add_argument('--json', action='store_true', help='Print JSON records instead of a table')
+
+    best_parser = commands.add_parser('best', help='Best rate for each amount of a currency across sources')
+    best_parser.add_argument('currency', help='Currency code, e.g. USD')
+    best_parser.add_argument('amounts', nargs='+', type=float)
+    best_parser.add_argument('--side', choices=('buy', 'sell'), default='buy',
+                             help='buy: changer buys the currency (highest rate); sell: lowest selling rate')
+    best_parser.add_argument('--quote', default='THB', help='Only compare sources quoting in this currency')
+    best_parser.add_argument('--sources', nargs='*')
+
+    board_parser = commands.add_parser('board', help='Crawl CashChanger sub-pages and print the best changer per currency')
+    board_parser.add_argument('--max-pages', type=int, default=200)
+    board_parser.add_argument('--concurrency', type=int, default=8)
+    board_parser.add_argument('--full', action='store_true', help='Print the whole changer x currency board')
+
+    commands.add_parser('sources', help='List registered rate sources')
+
+    args = parser.parse_args(argv)
+    if getattr(args, 'sources', None):
+        from sources import require_sources
+
+        try:
+            require_sources(args.sources)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.command == 'fetch':
+        return fetch(args.sources, as_json=args.json)
+    if args.command == 'best':
+        return best(args.currency, args.amounts, args.sources, side=args.side, quote_currency=args.quote)
+    if args.command == 'board':
+        return board(args.max_pages, args.concurrency, full=args.full)
+    return list_sources()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
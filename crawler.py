@@ -0,0 +1,307 @@
+"""
+CashChanger crawl mode: the full (changer x currency) rate board.
+
+The landing page only shows a few quotes per money changer, and the
+single-page parser keeps a fixed currency list. The crawler follows its
+per-changer (/singapore/changer/<id>) and per-currency (/singapore/<code>)
+links and fetches them concurrently. Concurrency is bounded, requests to
+each host are spaced out, and every URL is fetched at most once. Pages are
+parsed off the event loop, in the parse process pool when PARSE_WORKERS is
+set and in a thread otherwise, and merged into a RateBoard:
+
+    board = CashChangerCrawler().crawl()
+    board.best_changers()          # cheapest changer per currency
+    board.to_frame()               # changers x currencies
+
+Sub-pages are read with the landing page's rate-card markup
+(div.rate-card.changer[data-id], .changer-name, "USD 1 = SGD 1.2857").
+A page without cards is attributed to the changer id in its URL. Only
+currency pages for a code some page has quoted are followed, so
+/singapore/faq and /singapore/app are not.
+"""
+import asyncio
+import re
+from functools import partial
+from html.parser import HTMLParser
+from typing import Dict, List, Tuple
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+from cashchanger_parser import SGD_QUOTE
+from http_client import get_http_client, network_errors
+from metrics import inc, span
+from rate_matrix import BUY, SELL, RateMatrix
+from records import RateBatch, RateRecord
+
+LANDING_URL = 'https://cashchanger.co/singapore'
+CHANGER_LINK = re.compile(r'/singapore/changer/(\d+)/?$')
+CURRENCY_LINK = re.compile(r'/singapore/([a-z]{3})/?$')
+
+# When two pages quote the same (changer, currency), the more specific page wins
+LANDING, CURRENCY_PAGE, CHANGER_PAGE = 0, 1, 2
+
+# (changer id, changer name, currency, SGD per unit, page priority)
+BoardRow = Tuple[str, str, str, float, int]
+
+
+class _BoardPageParser(HTMLParser):
+    """Collects rate cards and links from one landing/changer/currency page"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links: List[str] = []
+        self.cards: List[Tuple[str, str, str]] = []   # (changer id, name, card text)
+        self.title = ''
+        self.text: List[str] = []
+        self._card = None            # [id, name parts, text parts, depth]
+        self._in_name = False
+        self._in_title = False
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = (attrs.get('class') or '').split()
+        if tag in ('script', 'style'):
+            self._skip_depth += 1
+        if tag == 'a' and attrs.get('href'):
+            self.links.append(attrs['href'])
+        if tag == 'h1':
+            self._in_title = True
+        if self._card is not None:
+            if tag == 'div':
+                self._card[3] += 1
+            if 'changer-name' in classes:
+                self._in_name = True
+        elif tag == 'div' and 'changer' in classes and attrs.get('data-id'):
+            self._card = [attrs['data-id'], [], [], 1]
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style'):
+            self._skip_depth = max(self._skip_depth - 1, 0)
+        if tag == 'h1':
+            self._in_title = False
+        if tag in ('h1', 'h2', 'h3', 'h4', 'p', 'span'):
+            self._in_name = False
+        if self._card is not None and tag == 'div':
+            self._card[3] -= 1
+            if self._card[3] == 0:
+                changer_id, name, text, _ = self._card
+                self.cards.append((changer_id, ''.join(name).strip(), ' '.join(text)))
+                self._card = None
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._in_title:
+            self.title += data
+        if self._card is not None:
+            if self._in_name:
+                self._card[1].append(data)
+            self._card[2].append(data)
+        else:
+            self.text.append(data)
+
+
+def _quotes(text: str):
+    for currency, amount, sgd_rate in SGD_QUOTE.findall(text):
+        try:
+            yield currency, float(sgd_rate) / float(amount)
+        except (ValueError, ZeroDivisionError):
+            continue
+
+
+def normalize_url(url: str) -> str:
+    """Crawl key for a URL: lower-case scheme and host, no fragment, no trailing slash"""
+    parts = urlsplit(url)
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ''))
+
+
+def parse_board_page(content: bytes, url: str) -> Tuple[List[BoardRow], List[str]]:
+    """Board rows and absolute links of one page; module-level so it runs in the parse pool"""
+    parser = _BoardPageParser()
+    parser.feed(content.decode('utf-8', errors='replace'))
+    parser.close()
+
+    path = urlsplit(url).path
+    changer_page = CHANGER_LINK.search(path)
+    priority = CHANGER_PAGE if changer_page else CURRENCY_PAGE if CURRENCY_LINK.search(path) else LANDING
+
+    rows: List[BoardRow] = []
+    for changer_id, name, text in parser.cards:
+        rows.extend((changer_id, name, currency, rate, priority) for currency, rate in _quotes(text))
+    if changer_page and not parser.cards:
+        name = parser.title.strip() or f'Changer {changer_page.group(1)}'
+        rows.extend((changer_page.group(1), name, currency, rate, priority)
+                    for currency, rate in _quotes(' '.join(parser.text)))
+    links = [normalize_url(urljoin(url, href)) for href in parser.links]
+    return rows, links
+
+
+class RateBoard:
+    """
+    Money changer x currency quotes in SGD per unit. A quote is one price
+    per currency, so the cheapest changer is the best place to buy that
+    currency with SGD.
+    """
+
+    def __init__(self, batch: RateBatch, pages: int = 0, errors: int = 0):
+        self.batch = batch
+        self.pages = pages
+        self.errors = errors
+        self.matrix = RateMatrix(batch, {name: 'SGD' for name in set(batch.source.tolist())})
+
+    def __len__(self) -> int:
+        return len(self.batch)
+
+    def changers(self) -> List[str]:
+        return sorted(set(self.batch.source.tolist()))
+
+    def currencies(self) -> List[str]:
+        return self.matrix.currencies()
+
+    def rate(self, changer: str, currency: str) -> float:
+        return self.matrix.rate(changer, currency)
+
+    def best_changers(self, cheapest: bool = True) -> Dict[str, RateRecord]:
+        """Best changer per currency: lowest SGD price (buying currency) or highest (selling it)"""
+        return self.matrix.best_rates(side=SELL if cheapest else BUY, quote_currency='SGD')
+
+    def to_frame(self):
+        """Changers as rows, currency codes as columns"""
+        return self.batch.to_frame().pivot_table(index='Source', columns='Currency', values='Buy Rate')
+
+
+class CashChangerCrawler:
+    """
+    Bounded-concurrency crawler over the CashChanger landing page and the
+    sub-pages it links to.
+
+    At most ``concurrency`` requests are in flight. Requests to the same
+    host start at least ``host_interval`` seconds apart, and no more than
+    ``max_pages`` pages are fetched.
+    """
+
+    def __init__(self, start_url: str = LANDING_URL, concurrency: int = 8, host_interval: float = 0.2,
+                 max_pages: int = 200, max_depth: int = 1, timeout: float = 10, client=None):
+        self.start_url = start_url
+        self.concurrency = concurrency
+        self.host_interval = host_interval
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.timeout = timeout
+        self.client = client or get_http_client()
+        self._next_slot: Dict[str, float] = {}
+
+    def crawl(self) -> RateBoard:
+        """Blocking crawl; runs on the async fetcher's loop when that backend is in use"""
+        with span('crawl', source='CashChanger'):
+            if hasattr(self.client, 'aget'):
+                return self.client.run(self.acrawl())
+            return asyncio.run(self.acrawl())
+
+    def _follow(self, url: str, currencies) -> bool:
+        """Changer pages, and currency pages for a code in ``currencies``, on the start URL's host"""
+        parts = urlsplit(url)
+        if parts.netloc != urlsplit(normalize_url(self.start_url)).netloc:
+            return False
+        if CHANGER_LINK.search(parts.path):
+            return True
+        currency_page = CURRENCY_LINK.search(parts.path)
+        return bool(currency_page and currency_page.group(1).upper() in currencies)
+
+    async def _wait_for_host(self, url: str) -> None:
+        # Single event loop: no lock needed around the slot bookkeeping
+        loop = asyncio.get_running_loop()
+        host = urlsplit(url).netloc
+        now = loop.time()
+        slot = max(now, self._next_slot.get(host, 0.0))
+        self._next_slot[host] = slot + self.host_interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def _get(self, url: str) -> bytes:
+        if hasattr(self.client, 'aget'):
+            response = await self.client.aget(url, timeout=self.timeout)
+        else:
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(None, partial(self.client.get, url, timeout=self.timeout))
+        response.raise_for_status()
+        inc('bytes_fetched_total', len(response.content), source='CashChanger crawl')
+        return response.content
+
+    async def _parse(self, content: bytes, url: str):
+        # Never parse on the loop: with the httpx backend it is the process-wide fetcher loop
+        from sources import get_parse_pool
+
+        return await asyncio.get_running_loop().run_in_executor(get_parse_pool(), parse_board_page, content, url)
+
+    async def acrawl(self) -> RateBoard:
+        queue: asyncio.Queue = asyncio.Queue()
+        start = normalize_url(self.start_url)
+        seen = {start}
+        queue.put_nowait((start, 0))
+        best: Dict[Tuple[str, str], BoardRow] = {}
+        # Display name per changer id: the card name from the least specific page
+        # (changer pages only have a heading)
+        names: Dict[str, Tuple[int, str]] = {}
+        currencies = set()
+        stats = {'pages': 0, 'errors': 0}
+
+        async def worker():
+            while True:
+                url, depth = await queue.get()
+                try:
+                    await self._wait_for_host(url)
+                    content = await self._get(url)
+                    rows, links = await self._parse(content, url)
+                    stats['pages'] += 1
+                    inc('crawl_pages_total', source='CashChanger')
+                    for row in rows:
+                        key = (row[0], row[2])
+                        if key not in best or row[4] >= best[key][4]:
+                            best[key] = row
+                        if row[0] not in names or row[4] < names[row[0]][0]:
+                            names[row[0]] = (row[4], row[1])
+                        currencies.add(row[2])
+                    if depth < self.max_depth:
+                        for link in links:
+                            if link not in seen and len(seen) < self.max_pages and self._follow(link, currencies):
+                                seen.add(link)
+                                queue.put_nowait((link, depth + 1))
+                except network_errors() as e:
+                    stats['errors'] += 1
+                    inc('crawl_errors_total', source='CashChanger', kind='network')
+                    print(f"[crawler] {url}: network error - {e}")
+                except Exception as e:
+                    stats['errors'] += 1
+                    inc('crawl_errors_total', source='CashChanger', kind='parse')
+                    print(f"[crawler] {url}: parsing error - {e}")
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(self.concurrency)]
+        try:
+            await queue.join()
+        finally:
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        batch = self._board_batch(best.values(), {cid: name for cid, (_, name) in names.items()})
+        return RateBoard(batch, stats['pages'], stats['errors'])
+
+    @staticmethod
+    def _board_batch(rows, names: Dict[str, str]) -> RateBatch:
+        # Changer names are not guaranteed unique; suffix the id when two changers share one
+        ids_by_name: Dict[str, set] = {}
+        for changer_id, name in names.items():
+            ids_by_name.setdefault(name, set()).add(changer_id)
+        labels = {changer_id: name if len(ids_by_name[name]) == 1 else f'{name} #{changer_id}'
+                  for changer_id, name in names.items()}
+        return RateBatch.from_records(
+            RateRecord(labels[changer_id], currency, rate, rate) for changer_id, _, currency, rate, _ in rows
+        )
+
+
+def crawl_cashchanger(**options) -> RateBoard:
+    return CashChangerCrawler(**options).crawl()
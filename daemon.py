@@ -0,0 +1,100 @@
+"""
+Standalone polling daemon: refreshes every rate source on its own interval
+and writes the results to the shared SnapshotStore, so the Streamlit app
+never scrapes inside a page render.
+
+    python daemon.py [--sources CashChanger "Grand Superrich"]
+"""
+import argparse
+import random
+import threading
+import time
+
+from scraper import CurrencyRateScraper
+from snapshot_store import SnapshotStore
+from metrics import profiled, serve_metrics
+from sources import BROWSER, get_source, require_sources
+
+JITTER = 0.1          # +/- fraction of the interval
+MAX_BACKOFF = 15 * 60
+
+
+def next_delay(interval: float, failures: int) -> float:
+    """Interval with jitter, doubled for every consecutive failure up to MAX_BACKOFF"""
+    delay = min(interval * (2 ** failures), MAX_BACKOFF) if failures else interval
+    return delay * random.uniform(1 - JITTER, 1 + JITTER)
+
+
+def poll_source(name, loader, store: SnapshotStore, interval: float, stop: threading.Event) -> None:
+    failures = 0
+    # Spread the first polls out so the sources don't start in lockstep
+    stop.wait(random.uniform(0, min(interval * JITTER, 5)))
+    while not stop.is_set():
+        started = time.time()
+        try:
+            with profiled(f'poll-{name}'):
+                batch = loader()
+        except Exception as e:
+            print(f"[daemon] {name}: {e}")
+            batch = None
+        if batch is not None and not batch.empty and batch.attrs.get('stale'):
+            # Circuit open or scrape failed: keep the stored snapshot (and its age) as is
+            failures += 1
+            print(f"[daemon] {name}: upstream unavailable (failure #{failures})")
+        elif batch is not None and not batch.empty:
+            if batch.attrs.get('unchanged'):
+                store.touch(name, fetched_at=started)
+            else:
+                store.write(name, batch, fetched_at=started)
+            failures = 0
+            print(f"[daemon] {name}: {len(batch)} rates in {time.time() - started:.1f}s")
+        else:
+            failures += 1
+            print(f"[daemon] {name}: no data (failure #{failures})")
+        stop.wait(next_delay(interval, failures))
+
+
+def run(names=None, store: SnapshotStore = None, stop: threading.Event = None,
+        metrics_port: int = None) -> None:
+    scraper = CurrencyRateScraper()
+    registry = scraper.sources()
+    names = names or list(registry)
+    require_sources(names)
+    store = store or SnapshotStore()
+    stop = stop or threading.Event()
+    if metrics_port:
+        serve_metrics(metrics_port)
+        print(f"[daemon] metrics on http://localhost:{metrics_port}/metrics")
+
+    if any(get_source(name).mode == BROWSER for name in names):
+        from browser_pool import warm_browser_pool
+        threading.Thread(target=warm_browser_pool, daemon=True).start()
+
+    threads = []
+    for name in names:
+        loader = scraper.guarded_source(name)
+        thread = threading.Thread(
+            target=poll_source,
+            args=(name, loader, store, get_source(name).poll_interval, stop),
+            name=f'poll-{name}', daemon=True,
+        )
+        thread.start()
+        threads.append(thread)
+
+    try:
+        while any(t.is_alive() for t in threads):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        stop.set()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Poll rate sources into the shared snapshot store')
+    parser.add_argument('--sources', nargs='*', help='Source names to poll (default: all registered)')
+    parser.add_argument('--metrics-port', type=int, default=9108, help='Serve /metrics here (0 to disable)')
+    args = parser.parse_args()
+    try:
+        require_sources(args.sources or [])
+    except ValueError as e:
+        parser.error(str(e))
+    run(args.sources, metrics_port=args.metrics_port)
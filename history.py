@@ -0,0 +1,262 @@
+import datetime as dt
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are serialized
+    fcntl = None
+
+import numpy as np
+import pandas as pd
+
+from records import RateBatch, as_batch
+
+HISTORY_DIR = os.environ.get("RATE_HISTORY_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "history"))
+
+# One fixed-size record per quote; partitions are raw arrays of these
+RECORD_DTYPE = np.dtype([
+    ("ts", "<i8"),            # UTC nanoseconds since epoch
+    ("source", "<u2"),
+    ("currency", "<u2"),
+    ("denomination", "<u2"),
+    ("buy", "<f8"),
+    ("sell", "<f8"),
+])
+
+
+def _to_ns(value) -> int:
+    if value is None:
+        return time.time_ns()
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return int(ts.value)
+
+
+def _day(ts_ns: int) -> dt.date:
+    return dt.datetime.fromtimestamp(ts_ns / 1e9, tz=dt.timezone.utc).date()
+
+
+class RateHistory:
+    """
+    Append-only rate history stored as one memory-mapped NumPy file per UTC day.
+
+    Records are keyed by (timestamp, source, currency, denomination); the
+    string keys are interned to small integer ids in ``symbols.json``.
+    Queries memory-map only the day partitions they touch and binary-search
+    the timestamp column, so the full history is never loaded.
+
+    Several processes (daemon, Streamlit fallback, superrich.py) may append
+    to one directory: appends hold an exclusive lock on ``.lock`` and
+    re-read ``symbols.json`` under it, so ids stay shared and each
+    partition stays sorted by timestamp.
+    """
+
+    def __init__(self, root: str = HISTORY_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self._symbols: Dict[str, List[str]] = {"source": [], "currency": [], "denomination": []}
+        self._ids: Dict[str, Dict[str, int]] = {"source": {}, "currency": {}, "denomination": {}}
+        self._symbols_dirty = False
+        os.makedirs(root, exist_ok=True)
+        self._load_symbols()
+
+    # -- symbols ---------------------------------------------------------
+
+    @property
+    def _symbols_path(self) -> str:
+        return os.path.join(self.root, "symbols.json")
+
+    def _load_symbols(self) -> None:
+        if os.path.exists(self._symbols_path):
+            with open(self._symbols_path, encoding="utf-8") as f:
+                self._symbols.update(json.load(f))
+        for kind, names in self._symbols.items():
+            self._ids[kind] = {name: i for i, name in enumerate(names)}
+
+    def _intern(self, kind: str, name: str) -> int:
+        ids = self._ids[kind]
+        if name not in ids:
+            ids[name] = len(self._symbols[kind])
+            self._symbols[kind].append(name)
+            self._symbols_dirty = True
+        return ids[name]
+
+    @contextmanager
+    def _write_lock(self):
+        """Exclusive across threads of this process and, where flock exists, across processes"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.root, ".lock"), "a") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _save_symbols(self) -> None:
+        tmp = self._symbols_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._symbols, f, ensure_ascii=False)
+        os.replace(tmp, self._symbols_path)
+
+    # -- writes ----------------------------------------------------------
+
+    def _partition_path(self, day: dt.date) -> str:
+        return os.path.join(self.root, f"{day.isoformat()}.bin")
+
+    def _intern_column(self, kind: str, values: np.ndarray) -> np.ndarray:
+        """Symbol ids for a column, interning each distinct value once"""
+        names, inverse = np.unique(values.astype(str), return_inverse=True)
+        ids = np.array([self._intern(kind, name) for name in names], dtype=np.uint16)
+        return ids[inverse.reshape(-1)]
+
+    def append(self, batch: Optional[RateBatch], timestamp=None) -> int:
+        """
+        Append one scrape. Takes a RateBatch; DataFrames in the display
+        schema are converted. Returns the number of records written.
+        """
+        batch = as_batch(batch)
+        if batch.empty:
+            return 0
+
+        with self._write_lock():
+            # Another writer may have added symbols since we last looked
+            self._load_symbols()
+            self._symbols_dirty = False
+            ts = _to_ns(timestamp)
+            records = np.zeros(len(batch), dtype=RECORD_DTYPE)
+            records["ts"] = ts
+            records["source"] = self._intern_column("source", batch.source)
+            records["currency"] = self._intern_column("currency", batch.currency)
+            records["denomination"] = self._intern_column("denomination", batch.denomination)
+            records["buy"] = batch.buy
+            records["sell"] = batch.sell
+
+            if self._symbols_dirty:
+                self._save_symbols()
+            self._write_partition(_day(ts), records)
+        return len(records)
+
+    def _write_partition(self, day: dt.date, records: np.ndarray) -> None:
+        """Append to a day partition, keeping it sorted by ts for searchsorted"""
+        path = self._partition_path(day)
+        existing = self._partition(day)
+        if not len(existing) or existing["ts"][-1] <= records["ts"][0]:
+            del existing
+            with open(path, "ab") as f:
+                f.write(records.tobytes())
+            return
+        # Backfilled (explicit, older) timestamp: rewrite the day in order
+        merged = np.concatenate([np.array(existing), records])
+        del existing
+        merged = merged[np.argsort(merged["ts"], kind="stable")]
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(merged.tobytes())
+        os.replace(tmp, path)
+
+    # -- reads -----------------------------------------------------------
+
+    def _partition(self, day: dt.date) -> np.ndarray:
+        path = self._partition_path(day)
+        if not os.path.exists(path) or os.path.getsize(path) < RECORD_DTYPE.itemsize:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        count = os.path.getsize(path) // RECORD_DTYPE.itemsize
+        return np.memmap(path, dtype=RECORD_DTYPE, mode="r", shape=(count,))
+
+    def _mask(self, records: np.ndarray, source: Optional[str], currency: Optional[str]) -> np.ndarray:
+        mask = np.ones(len(records), dtype=bool)
+        for kind, name in (("source", source), ("currency", currency)):
+            if name is not None:
+                if name not in self._ids[kind]:
+                    return np.zeros(len(records), dtype=bool)
+                mask &= records[kind] == self._ids[kind][name]
+        return mask
+
+    def _to_frame(self, records: np.ndarray) -> pd.DataFrame:
+        names = {kind: np.array(values, dtype=object) for kind, values in self._symbols.items()}
+        return pd.DataFrame({
+            "Timestamp": pd.to_datetime(records["ts"], unit="ns", utc=True),
+            "Source": names["source"][records["source"]] if len(records) else [],
+            "Currency": names["currency"][records["currency"]] if len(records) else [],
+            "Denomination": names["denomination"][records["denomination"]] if len(records) else [],
+            "Buy Rate": records["buy"],
+            "Sell Rate": records["sell"],
+        })
+
+    def range(self, start, end=None, source: Optional[str] = None,
+              currency: Optional[str] = None) -> pd.DataFrame:
+        """All records with start <= timestamp < end, oldest first"""
+        start_ns, end_ns = _to_ns(start), _to_ns(end)
+        with self._lock:
+            self._load_symbols()
+        chunks = []
+        day, last = _day(start_ns), _day(end_ns)
+        while day <= last:
+            records = self._partition(day)
+            if len(records):
+                lo, hi = np.searchsorted(records["ts"], [start_ns, end_ns], side="left")
+                window = records[lo:hi]
+                chunks.append(np.array(window[self._mask(window, source, currency)]))
+            day += dt.timedelta(days=1)
+        records = np.concatenate(chunks) if chunks else np.zeros(0, dtype=RECORD_DTYPE)
+        return self._to_frame(records)
+
+    def as_of(self, when=None, source: Optional[str] = None, currency: Optional[str] = None,
+              max_lookback_days: int = 7) -> pd.DataFrame:
+        """Latest record per (source, currency, denomination) at or before ``when``"""
+        when_ns = _to_ns(when)
+        with self._lock:
+            self._load_symbols()
+        day = _day(when_ns)
+        found = set()
+        latest = []
+        for _ in range(max_lookback_days + 1):
+            records = self._partition(day)
+            hi = np.searchsorted(records["ts"], when_ns, side="right") if len(records) else 0
+            if hi:
+                window = records[:hi]
+                window = np.array(window[self._mask(window, source, currency)][::-1])
+                if not len(window):
+                    day -= dt.timedelta(days=1)
+                    continue
+                keys = np.stack([window["source"], window["currency"], window["denomination"]], axis=1)
+                _, first = np.unique(keys, axis=0, return_index=True)
+                for row in window[np.sort(first)]:
+                    key = (row["source"], row["currency"], row["denomination"])
+                    if key not in found:
+                        found.add(key)
+                        latest.append(row)
+            day -= dt.timedelta(days=1)
+        records = np.array(latest, dtype=RECORD_DTYPE) if latest else np.zeros(0, dtype=RECORD_DTYPE)
+        return self._to_frame(records)
+
+
+_history_lock = threading.Lock()
+_history: Optional[RateHistory] = None
+
+
+def get_history() -> RateHistory:
+    """Process-wide history store under HISTORY_DIR"""
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = RateHistory()
+        return _history
+
+
+def record_scrape(batch: Optional[RateBatch], timestamp=None) -> int:
+    """Append a scrape to the shared history; never lets storage errors break a scrape"""
+    try:
+        return get_history().append(batch, timestamp)
+    except Exception as e:
+        print(f"[history] Failed to record scrape: {e}")
+        return 0
@@ -0,0 +1,185 @@
+import hashlib
+import importlib.util
+import os
+import re
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import inc, observe, span
+
+# urllib3 decodes "br" when brotli is installed; look it up without importing it
+ACCEPT_ENCODING = 'gzip, deflate, br' if importlib.util.find_spec('brotli') else 'gzip, deflate'
+
+
+def network_errors() -> tuple:
+    """
+    Errors from either client backend that mean the fetch failed, for
+    ``except network_errors():``. httpx is not imported here: its errors are
+    included once something (async_http) has imported it, since nothing
+    else can raise them.
+    """
+    httpx = sys.modules.get('httpx')
+    if httpx is None:
+        return (requests.RequestException,)
+    return (requests.RequestException, httpx.TransportError, httpx.HTTPStatusError)
+
+
+# Statuses worth retrying; other 4xx answers won't change on a second try
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+def is_transient(error: BaseException) -> bool:
+    """Connection errors and timeouts, or an HTTP error response with a retryable status"""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return True
+    return response.status_code in RETRYABLE_STATUS or response.status_code >= 500
+
+
+# "async" (async_http.AsyncFetcher, when httpx is installed) or "requests"
+HTTP_BACKEND = os.environ.get('HTTP_BACKEND', 'async')
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+_session_lock = threading.Lock()
+_shared_session = None
+
+
+def get_shared_session() -> requests.Session:
+    """Return the process-wide pooled HTTP session used by every scraper"""
+    global _shared_session
+    with _session_lock:
+        if _shared_session is None:
+            session = requests.Session()
+            session.headers.update({'User-Agent': USER_AGENT, 'Accept-Encoding': ACCEPT_ENCODING})
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _shared_session = session
+        return _shared_session
+
+
+def get_http_client():
+    """
+    The client HTTP sources fetch through: the process-wide asyncio/httpx
+    fetcher (HTTP/2, keep-alive, cached DNS) when available, otherwise the
+    pooled requests session. Both expose ``get(url, headers=, timeout=)``.
+    """
+    if HTTP_BACKEND == 'async':
+        from async_http import HTTPX_AVAILABLE, get_async_fetcher
+        if HTTPX_AVAILABLE:
+            return get_async_fetcher()
+    return get_shared_session()
+
+
+def _time_to_headers(response) -> float:
+    ttfb = getattr(response, 'extensions', {}).get('ttfb')
+    return ttfb if ttfb is not None else response.elapsed.total_seconds()
+
+
+# Markup, scripts and comments: session tokens, build ids and data attributes live here
+_NON_TEXT = re.compile(rb'<(script|style)\b.*?</\1\s*>|<!--.*?-->|<[^>]*>', re.S | re.I)
+# Text that changes on every load without the rates changing
+_VOLATILE = re.compile(
+    rb'\d+\s*(?:secs?|seconds?|mins?|minutes?|hrs?|hours?|days?)\s+ago'
+    rb'|\d{4}-\d{2}-\d{2}|\d{1,2}:\d{2}(?::\d{2})?',
+    re.I,
+)
+# Currency codes and every number (integer or decimal) next to them
+_RATE_TOKEN = re.compile(rb'\b[A-Z]{3}\b|\d[\d,]*(?:\.\d+)?')
+
+
+def rate_fingerprint(content: bytes) -> str:
+    """
+    Hash of the currency codes and numbers in the page's visible text, in
+    order. Codes, denominations and integer rates ("25") all count. Markup,
+    scripts, "updated 3 min ago" banners, clock times and dates do not, so a
+    page that only re-rendered is reported as unchanged.
+    """
+    text = _VOLATILE.sub(b' ', _NON_TEXT.sub(b' ', content))
+    digest = hashlib.blake2b(digest_size=16)
+    for token in _RATE_TOKEN.findall(text):
+        digest.update(token)
+        digest.update(b'|')
+    return digest.hexdigest()
+
+
+class _PageState:
+    __slots__ = ('etag', 'last_modified', 'digest', 'parsed')
+
+    def __init__(self):
+        self.etag = None
+        self.last_modified = None
+        self.digest = None
+        self.parsed = None
+
+
+_page_lock = threading.Lock()
+_page_states: Dict[str, _PageState] = {}
+
+
+def fetch_if_changed(url: str, parse: Callable[[Any], Any],
+                     session=None, timeout: float = 10,
+                     fingerprint: Callable[[bytes], str] = rate_fingerprint,
+                     source: Optional[str] = None) -> Tuple[Any, bool]:
+    """
+    GET ``url`` and return ``(parse(response), True)``, or the previous
+    parsed result and False when nothing changed: either the server answered
+    304 to our If-None-Match/If-Modified-Since, or the page's rate
+    fingerprint matches the last fetch. Empty parse results are not kept,
+    and neither are the validators of the page that produced them.
+    Timings and byte counts are recorded under the ``source`` label.
+    ``session`` is a requests.Session or an AsyncFetcher (see get_http_client).
+    """
+    source = source or url
+    session = session or get_http_client()
+    with _page_lock:
+        state = _page_states.setdefault(url, _PageState())
+        headers = {}
+        if state.parsed is not None:
+            if state.etag:
+                headers['If-None-Match'] = state.etag
+            if state.last_modified:
+                headers['If-Modified-Since'] = state.last_modified
+
+    started = time.perf_counter()
+    with span('http_request', source=source):
+        response = session.get(url, headers=headers, timeout=timeout)
+    # Both clients read the body eagerly: connect + time to headers, the rest is download
+    ttfb = _time_to_headers(response)
+    observe('connect_ttfb', ttfb, source=source)
+    observe('download', max(time.perf_counter() - started - ttfb, 0), source=source)
+    inc('bytes_fetched_total', len(response.content), source=source)
+    if response.status_code == 304 and state.parsed is not None:
+        inc('not_modified_total', source=source)
+        return state.parsed, False
+    response.raise_for_status()
+
+    with span('fingerprint', source=source):
+        digest = fingerprint(response.content)
+    with _page_lock:
+        if digest == state.digest and state.parsed is not None:
+            inc('unchanged_pages_total', source=source)
+            return state.parsed, False
+
+    parsed = parse(response)
+    if parsed is not None and not getattr(parsed, 'empty', False):
+        # Validators only describe the page behind ``parsed``: a 304 must never
+        # revive an older result after a newer page failed to parse
+        with _page_lock:
+            state.etag = response.headers.get('ETag')
+            state.last_modified = response.headers.get('Last-Modified')
+            state.digest = digest
+            state.parsed = parsed
+    return parsed, True
+
+
+def clear_page_states() -> None:
+    """Forget validators and fingerprints, forcing the next fetch of every URL to parse"""
+    with _page_lock:
+        _page_states.clear()
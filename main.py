@@ -1,9 +1,42 @@
 import streamlit as st
 import pandas as pd
+import notify
 from scraper import CurrencyRateScraper
+from snapshot_store import SnapshotStore
+from sources import registered_sources
 import time
 
+# Snapshots older than this are treated as missing (daemon not running)
+MAX_SNAPSHOT_AGE = 15 * 60
+
+
+@st.cache_resource
+def get_snapshot_store() -> SnapshotStore:
+    return SnapshotStore()
+
+
+def load_rates(scraper: CurrencyRateScraper) -> dict:
+    """
+    Read the latest snapshots written by daemon.py. Only sources the daemon
+    hasn't delivered recently are fetched live (through the shared cache).
+    """
+    store = get_snapshot_store()
+    results, missing = {}, []
+    for name in [source.name for source in registered_sources() if source.on_page]:
+        batch, fetched_at = store.read(name)
+        if fetched_at is not None and time.time() - fetched_at < MAX_SNAPSHOT_AGE and not batch.empty:
+            results[name] = batch
+        else:
+            missing.append(name)
+    
+    if missing:
+        with st.spinner(f"Fetching {', '.join(missing)} live (rate daemon not running)..."):
+            results.update(scraper.fetch_all(missing))
+    return results
+
+
 def main():
+    notify.set_handler(notify.streamlit_handler)
     st.title("Currency Exchange Rates - Live Data")
     st.markdown("CashChanger Singapore rates **multiplied** by Grand Superrich SGD buying rate + SGD 100 note pricing")
     
@@ -19,60 +52,31 @@ def main():
     with col2:
         st.markdown(f"*Last updated: {time.strftime('%Y-%m-%d %H:%M:%S')}*")
     
-    # Show loading spinner
-    with st.spinner("Fetching currency rates from CashChanger Singapore..."):
-        # Get CashChanger data
-        cashchanger_data = scraper.scrape_cashchanger()
-        # print(cashchanger_data)
-    
-    # Also fetch Singapore 100 note pricing from Grand Superrich
-    with st.spinner("Fetching Singapore 100 note pricing from Grand Superrich..."):
-        superrich_data = scraper.scrape_grandsuperrich_sgd100()
-    
-    # Combine all data
-    all_data = []
-    grand_sgd_buy_rate = None
+    results = load_rates(scraper)
     
-    if superrich_data is not None and not superrich_data.empty:
-        st.success("Successfully fetched Singapore 100 note pricing from Grand Superrich!")
-        
-        # Get the SGD buying rate from Grand Superrich to use as multiplier
-        for _, row in superrich_data.iterrows():
-            if 'SGD' in row['Currency']:
-                grand_sgd_buy_rate = row['Buy Rate']
-                st.info(f"Using Grand Superrich SGD buying rate: {grand_sgd_buy_rate}")
-                break
+    for name, batch in results.items():
+        if batch is not None and not batch.empty and batch.attrs.get('stale'):
+            age = time.time() - batch.attrs['fetched_at']
+            st.warning(f"{name} is unavailable; showing its last good rates from {age / 60:.0f} min ago")
+        elif batch is not None and not batch.empty:
+            st.success(f"Successfully fetched currency rates from {name}!")
     
-    if cashchanger_data is not None and not cashchanger_data.empty:
-        st.success("Successfully fetched currency rates from CashChanger!")
-        
-        # Add CashChanger rates multiplied by Grand Superrich SGD rate
-        for _, row in cashchanger_data.iterrows():
-            if grand_sgd_buy_rate is not None:
-                # Multiply CashChanger rate with Grand Superrich SGD buying rate
-                multiplied_rate = row['Buy Rate'] * grand_sgd_buy_rate
-                all_data.append({
-                    'Codes': row['Currency'],
-                    'rates': multiplied_rate
-                })
-            else:
-                # Use original rate if no Grand Superrich rate available
-                all_data.append({
-                    'Codes': row['Currency'],
-                    'rates': row['Buy Rate']
-                })
+    # Cross rates for every currency/source in one pass
+    combined = scraper.combine_data(*results.values())
+    all_data = not combined.empty
     
-    if superrich_data is not None and not superrich_data.empty:
-        # Add Grand Superrich SGD rate for reference
-        for _, row in superrich_data.iterrows():
-            all_data.append({
-                'Codes': row['Currency'],
-                'rates': row['Buy Rate']
-            })
+    if all_data:
+        # The bridge rate this table was computed with
+        grand_sgd_buy_rate = combined.attrs.get('bridge_rate', float('nan'))
+        if pd.notna(grand_sgd_buy_rate):
+            st.info(f"Using Grand Superrich SGD buying rate: {grand_sgd_buy_rate}")
     
     if all_data:
-        # Create DataFrame for display
-        display_df = pd.DataFrame(all_data)
+        # Create DataFrame for display; fall back to the original rate if no Grand Superrich rate available
+        display_df = pd.DataFrame({
+            'Codes': combined['Currency'],
+            'rates': combined['THB Buy'].fillna(combined['Buy Rate'])
+        })
         
         # Display the table
         st.dataframe(
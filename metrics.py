@@ -0,0 +1,165 @@
+"""
+Per-stage timing spans and counters for the scrape hot path, rendered in the
+Prometheus text format.
+
+    with span('parse', source='CashChanger'):
+        ...
+    inc('rows_parsed_total', len(rows), source='CashChanger')
+
+RATES_TRACE=1 also prints every span as a JSON line. RATES_PROFILE=cprofile
+or RATES_PROFILE=pyinstrument makes ``profiled()`` blocks write a profile
+to RATES_PROFILE_DIR (default ./profiles).
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+
+PREFIX = 'rates_'
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TRACE = os.environ.get('RATES_TRACE', '') not in ('', '0')
+PROFILE = os.environ.get('RATES_PROFILE', '').lower()
+PROFILE_DIR = os.environ.get('RATES_PROFILE_DIR', 'profiles')
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_lock = threading.Lock()
+_counters: Dict[Tuple[str, Labels], float] = {}
+_histograms: Dict[Labels, list] = {}   # labels -> [bucket counts..., sum, count]
+
+
+def _labels(labels: dict) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def inc(name: str, value: float = 1, **labels) -> None:
+    """Add ``value`` to the counter ``name`` with the given labels"""
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(stage: str, seconds: float, **labels) -> None:
+    """Record a stage duration in the rates_stage_seconds histogram"""
+    key = _labels({'stage': stage, **labels})
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [0] * (len(BUCKETS) + 2)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                hist[i] += 1
+        hist[-2] += seconds
+        hist[-1] += 1
+    if TRACE:
+        print(json.dumps({'trace': stage, 'ms': round(seconds * 1000, 2), **labels}))
+
+
+@contextlib.contextmanager
+def span(stage: str, **labels):
+    """Time the enclosed block as one ``stage``; failures are counted separately"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        inc('stage_errors_total', stage=stage, **labels)
+        raise
+    finally:
+        observe(stage, time.perf_counter() - started, **labels)
+
+
+def _format_labels(labels: Labels, extra: str = '') -> str:
+    parts = [f'{k}="{v}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def render_prometheus() -> str:
+    """All counters and stage histograms in the Prometheus text exposition format"""
+    lines = []
+    with _lock:
+        counters = dict(_counters)
+        histograms = {k: list(v) for k, v in _histograms.items()}
+
+    for name in sorted({name for name, _ in counters}):
+        lines.append(f'# TYPE {PREFIX}{name} counter')
+        for (counter, labels), value in sorted(counters.items()):
+            if counter == name:
+                lines.append(f'{PREFIX}{name}{_format_labels(labels)} {value}')
+
+    if histograms:
+        metric = f'{PREFIX}stage_seconds'
+        lines.append(f'# TYPE {metric} histogram')
+        for labels, hist in sorted(histograms.items()):
+            for bound, count in zip(BUCKETS, hist):
+                le = 'le="%s"' % bound
+                lines.append(f'{metric}_bucket{_format_labels(labels, le)} {count}')
+            le = 'le="+Inf"'
+            lines.append(f'{metric}_bucket{_format_labels(labels, le)} {hist[-1]}')
+            lines.append(f'{metric}_sum{_format_labels(labels)} {hist[-2]}')
+            lines.append(f'{metric}_count{_format_labels(labels)} {hist[-1]}')
+    return '\n'.join(lines) + '\n'
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def serve_metrics(port: int, host: str = '0.0.0.0') -> ThreadingHTTPServer:
+    """Expose /metrics on a background thread (for processes without a web app)"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != '/metrics':
+                self.send_error(404)
+                return
+            body = render_prometheus().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    return server
+
+
+@contextlib.contextmanager
+def profiled(name: str):
+    """Profile the enclosed block when RATES_PROFILE is set, otherwise do nothing"""
+    if PROFILE not in ('cprofile', 'pyinstrument'):
+        yield
+        return
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stem = os.path.join(PROFILE_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{threading.get_ident()}")
+    if PROFILE == 'pyinstrument':
+        from pyinstrument import Profiler
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            with open(stem + '.html', 'w', encoding='utf-8') as f:
+                f.write(profiler.output_html())
+    else:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(stem + '.prof')
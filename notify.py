@@ -0,0 +1,39 @@
+"""
+Status messages from the scrapers ("Fetching rates from ...", network
+errors, ...). They are printed to stderr unless a front end installs its
+own handler, so the scrapers never have to import Streamlit themselves:
+
+    import notify
+    notify.set_handler(notify.streamlit_handler)
+"""
+import sys
+from typing import Callable
+
+INFO = 'info'
+SUCCESS = 'success'
+WARNING = 'warning'
+ERROR = 'error'
+
+Handler = Callable[[str, str], None]
+
+
+def print_handler(level: str, message: str) -> None:
+    print(message, file=sys.stderr)
+
+
+def streamlit_handler(level: str, message: str) -> None:
+    """Render as st.info / st.success / st.warning / st.error"""
+    import streamlit as st
+    getattr(st, level)(message)
+
+
+_handler: Handler = print_handler
+
+
+def set_handler(handler: Handler) -> None:
+    global _handler
+    _handler = handler
+
+
+def notify(level: str, message: str) -> None:
+    _handler(level, message)
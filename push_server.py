@@ -0,0 +1,104 @@
+"""
+Flask-SocketIO server that pushes rate changes to connected clients.
+
+Clients get the full table once on connect ("rates_snapshot") and after
+that only the (currency, source, buy, sell) tuples that changed since the
+last scrape ("rates_delta"). Rates come from the SnapshotStore written by
+daemon.py, so any number of clients costs one scrape per poll.
+
+    python push_server.py
+    gunicorn -k eventlet -w 1 push_server:app
+"""
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from flask import Flask, Response
+from flask_socketio import SocketIO, emit
+
+from metrics import inc, render_prometheus
+from snapshot_store import SnapshotStore
+
+PUSH_POLL_INTERVAL = float(os.environ.get("PUSH_POLL_INTERVAL", "2"))
+
+RateKey = Tuple[str, str]
+RateValue = Tuple[float, float]
+
+app = Flask(__name__)
+socketio = SocketIO(app, cors_allowed_origins="*")
+_state = {"rates": {}, "versions": {}, "watcher": None}
+_store_lock = threading.Lock()
+_store: Optional[SnapshotStore] = None
+
+
+def get_store() -> SnapshotStore:
+    """Snapshot store, opened on first use so importing the module never touches rates.db"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SnapshotStore()
+        return _store
+
+
+def rate_tuples(snapshots) -> Dict[RateKey, RateValue]:
+    """Flatten SnapshotStore.read_all() into {(currency, source): (buy, sell)}"""
+    rates = {}
+    for source, (batch, _) in snapshots.items():
+        for currency, buy, sell in zip(batch.labels, batch.buy.tolist(), batch.sell.tolist()):
+            rates[(currency, source)] = (buy, sell)
+    return rates
+
+
+def diff_rates(previous: Dict[RateKey, RateValue], current: Dict[RateKey, RateValue]) -> List[dict]:
+    """Changed or new tuples, plus removed ones with buy/sell set to None"""
+    changes = [
+        {"currency": currency, "source": source, "buy": buy, "sell": sell}
+        for (currency, source), (buy, sell) in current.items()
+        if previous.get((currency, source)) != (buy, sell)
+    ]
+    changes.extend(
+        {"currency": currency, "source": source, "buy": None, "sell": None}
+        for currency, source in previous.keys() - current.keys()
+    )
+    return changes
+
+
+def _as_messages(rates: Dict[RateKey, RateValue]) -> List[dict]:
+    return [{"currency": c, "source": s, "buy": b, "sell": v} for (c, s), (b, v) in rates.items()]
+
+
+def watch_snapshots() -> None:
+    """Poll the store and broadcast deltas whenever a source's snapshot changes"""
+    while True:
+        snapshots = get_store().read_all()
+        versions = {source: fetched_at for source, (_, fetched_at) in snapshots.items()}
+        # An unchanged scrape only bumps fetched_at; the diff below then finds nothing to send
+        if versions != _state["versions"]:
+            current = rate_tuples(snapshots)
+            changes = diff_rates(_state["rates"], current)
+            _state["rates"], _state["versions"] = current, versions
+            if changes:
+                inc("push_deltas_total")
+                inc("push_changes_total", len(changes))
+                socketio.emit("rates_delta", changes)
+        socketio.sleep(PUSH_POLL_INTERVAL)
+
+
+@app.route("/metrics")
+def metrics():
+    return Response(render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+
+@socketio.on("connect")
+def on_connect():
+    if _state["watcher"] is None:
+        _state["watcher"] = socketio.start_background_task(watch_snapshots)
+    if not _state["versions"]:
+        snapshots = get_store().read_all()
+        _state["rates"] = rate_tuples(snapshots)
+        _state["versions"] = {source: fetched_at for source, (_, fetched_at) in snapshots.items()}
+    emit("rates_snapshot", _as_messages(_state["rates"]))
+
+
+if __name__ == "__main__":
+    socketio.run(app, host="0.0.0.0", port=int(os.environ.get("PUSH_PORT", "5000")))
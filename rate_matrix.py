@@ -0,0 +1,157 @@
+"""
+Denomination-aware rate matrix.
+
+Quotes from every source are indexed by (source, currency, denomination),
+so a lookup such as "Grand Superrich SGD 100 buy rate" is a dict probe
+instead of a scan over rows. Denomination bands ("100", "50-20", "1000-100")
+are parsed once into note ranges, which makes "best rate for amount X"
+queries a masked argmax over a small rate array:
+
+    matrix = RateMatrix.from_batches(results.values())
+    matrix.rate('Grand Superrich', 'SGD', '100')
+    best = matrix.best_for_amounts('USD', [100, 20, 5])
+    best.source, best.rate, best.total
+"""
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from records import RateBatch, RateRecord
+
+BUY = 'buy'
+SELL = 'sell'
+
+NOTE_VALUE = re.compile(r'\d+(?:\.\d+)?')
+
+Key = Tuple[str, str, str]
+
+
+def note_range(denomination: str) -> Tuple[float, float]:
+    """Smallest and largest note a denomination band covers; (0, inf) when it has none"""
+    values = [float(v) for v in NOTE_VALUE.findall(denomination.replace(',', ''))]
+    if not values:
+        return 0.0, float('inf')
+    return min(values), max(values)
+
+
+@dataclass(frozen=True)
+class BestRates:
+    """Per-amount result of ``RateMatrix.best_for_amounts``; NaN / '' where no quote applies"""
+    amount: np.ndarray
+    rate: np.ndarray
+    total: np.ndarray
+    source: np.ndarray
+    denomination: np.ndarray
+
+
+class RateMatrix:
+    """
+    Read-only index over one refresh worth of quotes.
+
+    ``quote_currencies`` maps a source to the currency its rates are quoted
+    in (default THB); best-rate queries only compare sources quoting in the
+    same currency.
+    """
+
+    def __init__(self, batch: RateBatch, quote_currencies: Optional[Dict[str, str]] = None):
+        self.batch = batch.unique()
+        quote_currencies = quote_currencies or {}
+        self.quote = np.array([quote_currencies.get(s, 'THB') for s in self.batch.source], dtype=object)
+        ranges = np.array([note_range(d) for d in self.batch.denomination], dtype=np.float64).reshape(-1, 2)
+        self.min_note, self.max_note = ranges[:, 0], ranges[:, 1]
+
+        self._index: Dict[Key, int] = {}
+        self._default: Dict[Tuple[str, str], int] = {}
+        self._by_currency: Dict[str, List[int]] = {}
+        for i, key in enumerate(zip(self.batch.source, self.batch.currency, self.batch.denomination)):
+            self._index[key] = i
+            self._by_currency.setdefault(key[1], []).append(i)
+            # Without a denomination, (source, currency) resolves to the largest-note quote
+            current = self._default.get(key[:2])
+            if current is None or self.max_note[i] > self.max_note[current]:
+                self._default[key[:2]] = i
+        self._rows = {code: np.array(rows, dtype=np.intp) for code, rows in self._by_currency.items()}
+
+    @classmethod
+    def from_batches(cls, batches: Iterable[RateBatch],
+                     quote_currencies: Optional[Dict[str, str]] = None) -> 'RateMatrix':
+        return cls(RateBatch.concat(batches), quote_currencies)
+
+    # -- point lookups ---------------------------------------------------
+
+    def _row(self, source: str, currency: str, denomination: Optional[str]) -> Optional[int]:
+        if denomination is None:
+            return self._default.get((source, currency))
+        return self._index.get((source, currency, denomination))
+
+    def get(self, source: str, currency: str, denomination: Optional[str] = None) -> Optional[RateRecord]:
+        """
+        The quote for (source, currency, denomination). Without a
+        denomination the largest-note quote of that currency is returned.
+        """
+        i = self._row(source, currency, denomination)
+        if i is None:
+            return None
+        b = self.batch
+        return RateRecord(b.source[i], b.currency[i], b.buy[i], b.sell[i], b.denomination[i])
+
+    def rate(self, source: str, currency: str, denomination: Optional[str] = None, side: str = BUY) -> float:
+        """Buy or sell rate for one quote, NaN if the matrix has none"""
+        i = self._row(source, currency, denomination)
+        if i is None:
+            return np.nan
+        return float((self.batch.buy if side == BUY else self.batch.sell)[i])
+
+    def __contains__(self, key: Key) -> bool:
+        return key in self._index
+
+    def __len__(self) -> int:
+        return len(self.batch)
+
+    def currencies(self) -> List[str]:
+        return sorted(self._rows)
+
+    # -- best-rate queries -----------------------------------------------
+
+    def best_for_amounts(self, currency: str, amounts, side: str = BUY,
+                         quote_currency: str = 'THB') -> BestRates:
+        """
+        Best quote for each amount of ``currency`` across all sources quoting
+        in ``quote_currency``. A denomination band applies to an amount when
+        the amount covers at least one of its smallest notes. ``side=BUY``
+        (changer buys the currency from you) takes the highest buy rate,
+        ``side=SELL`` the lowest sell rate.
+        """
+        amounts = np.atleast_1d(np.asarray(amounts, dtype=np.float64))
+        rows = self._rows.get(currency, np.zeros(0, dtype=np.intp))
+        rows = rows[self.quote[rows] == quote_currency]
+
+        rate = np.full(len(amounts), np.nan)
+        source = np.full(len(amounts), '', dtype=object)
+        denomination = np.full(len(amounts), '', dtype=object)
+        if len(rows):
+            rates = (self.batch.buy if side == BUY else self.batch.sell)[rows]
+            # amounts x quotes: which bands each amount can use
+            eligible = (amounts[:, None] >= self.min_note[rows][None, :]) & ~np.isnan(rates)[None, :]
+            fill = -np.inf if side == BUY else np.inf
+            scores = np.where(eligible, rates[None, :], fill)
+            pick = scores.argmax(axis=1) if side == BUY else scores.argmin(axis=1)
+            found = eligible[np.arange(len(amounts)), pick]
+            chosen = rows[pick[found]]
+            rate[found] = rates[pick[found]]
+            source[found] = self.batch.source[chosen]
+            denomination[found] = self.batch.denomination[chosen]
+        return BestRates(amounts, rate, amounts * rate, source, denomination)
+
+    def best_rates(self, side: str = BUY, quote_currency: str = 'THB') -> Dict[str, RateRecord]:
+        """Best quote per currency for any amount (largest notes), keyed by currency code"""
+        best = {}
+        for currency in self.currencies():
+            result = self.best_for_amounts(currency, [np.inf], side, quote_currency)
+            if result.source[0]:
+                record = self.get(result.source[0], currency, result.denomination[0])
+                if record is not None:
+                    best[currency] = record
+        return best
@@ -0,0 +1,224 @@
+"""
+One rate schema for every source.
+
+A ``RateRecord`` is a single quote; a ``RateBatch`` holds a whole scrape as
+parallel arrays (struct of arrays): interned source, currency code and
+denomination strings plus float64 buy/sell columns. Scrapers, the cache,
+the snapshot store and the history all pass batches around; a DataFrame is
+only built at display time with ``RateBatch.to_frame()``.
+
+    batch = RateBatch.from_records([RateRecord('Grand Superrich', 'SGD', 25.1, 25.2, '100')])
+    batch.to_frame()   # Currency "SGD 100", Buy Rate, Sell Rate, Source, Denomination
+"""
+import re
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+# "SGD 100": currency code followed by a note denomination
+DENOMINATION_IN_CURRENCY = re.compile(r'^([A-Z]{3})\s+(.+)$')
+
+
+def _interned(values: Iterable) -> np.ndarray:
+    return np.array([sys.intern(str(value)) for value in values], dtype=object)
+
+
+class RateRecord:
+    """One quote: ``buy``/``sell`` are in the source's quote currency per unit of ``currency``"""
+
+    __slots__ = ('source', 'currency', 'buy', 'sell', 'denomination')
+
+    def __init__(self, source: str, currency: str, buy: float, sell: float, denomination: str = ''):
+        self.source = sys.intern(source)
+        self.currency = sys.intern(currency)
+        self.buy = float(buy)
+        self.sell = float(sell)
+        self.denomination = sys.intern(denomination)
+
+    @property
+    def label(self) -> str:
+        """Display name, e.g. "SGD 100" for a denominated quote"""
+        return f'{self.currency} {self.denomination}' if self.denomination else self.currency
+
+    def __eq__(self, other):
+        if not isinstance(other, RateRecord):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return (f'RateRecord({self.source!r}, {self.label!r}, buy={self.buy}, sell={self.sell})')
+
+
+class RateBatch:
+    """
+    A scrape as columns. ``attrs`` carries per-scrape flags the pipeline
+    already uses on DataFrames (``unchanged``, ``stale``, ``fetched_at``).
+    """
+
+    __slots__ = ('source', 'currency', 'denomination', 'buy', 'sell', 'attrs')
+
+    def __init__(self, source: Iterable[str] = (), currency: Iterable[str] = (),
+                 buy: Iterable[float] = (), sell: Iterable[float] = (),
+                 denomination: Optional[Iterable[str]] = None, attrs: Optional[dict] = None):
+        self.source = _interned(source)
+        self.currency = _interned(currency)
+        self.buy = np.asarray(buy, dtype=np.float64)
+        self.sell = np.asarray(sell, dtype=np.float64)
+        if denomination is None:
+            self.denomination = np.full(len(self.currency), '', dtype=object)
+        else:
+            self.denomination = _interned(denomination)
+        self.attrs = dict(attrs or {})
+        if not (len(self.source) == len(self.currency) == len(self.buy) == len(self.sell) == len(self.denomination)):
+            raise ValueError('RateBatch columns must have the same length')
+
+    @classmethod
+    def _wrap(cls, source, currency, denomination, buy, sell, attrs=None) -> 'RateBatch':
+        """Build from columns that are already interned arrays (no copying)"""
+        batch = cls.__new__(cls)
+        batch.source, batch.currency, batch.denomination = source, currency, denomination
+        batch.buy, batch.sell = buy, sell
+        batch.attrs = dict(attrs or {})
+        return batch
+
+    def __reduce__(self):
+        # Re-intern the strings when a batch comes back from a parse pool worker
+        return (RateBatch, (self.source, self.currency, self.buy, self.sell, self.denomination, self.attrs))
+
+    # -- construction ----------------------------------------------------
+
+    @classmethod
+    def from_records(cls, records: Iterable[RateRecord]) -> 'RateBatch':
+        records = list(records)
+        return cls._wrap(
+            np.array([r.source for r in records], dtype=object),
+            np.array([r.currency for r in records], dtype=object),
+            np.array([r.denomination for r in records], dtype=object),
+            np.array([r.buy for r in records], dtype=np.float64),
+            np.array([r.sell for r in records], dtype=np.float64),
+        )
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict]) -> 'RateBatch':
+        """
+        From dicts in the display schema (Currency, Buy Rate, Sell Rate,
+        Source and optional Denomination), as returned by plugin parsers and
+        stored by older snapshots. "SGD 100" is split into code and denomination.
+        """
+        records = []
+        for row in rows:
+            currency, denomination = str(row['Currency']), row.get('Denomination')
+            # Concatenated frames leave NaN where a source has no denominations
+            denomination = '' if denomination is None or denomination != denomination else str(denomination)
+            match = DENOMINATION_IN_CURRENCY.match(currency)
+            if match and not denomination:
+                currency, denomination = match.groups()
+            elif match and match.group(2) == denomination:
+                currency = match.group(1)
+            records.append(RateRecord(str(row['Source']), currency, row['Buy Rate'], row['Sell Rate'], denomination))
+        return cls.from_records(records)
+
+    @classmethod
+    def from_frame(cls, df) -> 'RateBatch':
+        if df is None or df.empty:
+            return cls()
+        return cls.from_rows(df.to_dict('records'))
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, list]) -> 'RateBatch':
+        """Inverse of ``to_columns``"""
+        return cls(columns['source'], columns['currency'], columns['buy'], columns['sell'],
+                   columns.get('denomination'))
+
+    @classmethod
+    def concat(cls, batches: Iterable['RateBatch']) -> 'RateBatch':
+        batches = [b for b in batches if b is not None and len(b)]
+        if not batches:
+            return cls()
+        return cls._wrap(*(np.concatenate([getattr(b, name) for b in batches])
+                           for name in ('source', 'currency', 'denomination', 'buy', 'sell')))
+
+    # -- access ----------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.buy)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.buy) == 0
+
+    def __iter__(self) -> Iterator[RateRecord]:
+        for source, currency, buy, sell, denomination in zip(
+                self.source, self.currency, self.buy, self.sell, self.denomination):
+            yield RateRecord(source, currency, buy, sell, denomination)
+
+    @property
+    def labels(self) -> np.ndarray:
+        """Display currency per row: the code, or "SGD 100" for denominated quotes"""
+        return np.array([f'{c} {d}' if d else c for c, d in zip(self.currency, self.denomination)], dtype=object)
+
+    def with_attrs(self, **attrs) -> 'RateBatch':
+        """Same columns (shared, not copied) with extra attrs"""
+        return RateBatch._wrap(self.source, self.currency, self.denomination,
+                               self.buy, self.sell, {**self.attrs, **attrs})
+
+    def unique(self) -> 'RateBatch':
+        """First quote per (source, currency, denomination)"""
+        seen = {}
+        for i, key in enumerate(zip(self.source, self.currency, self.denomination)):
+            seen.setdefault(key, i)
+        if len(seen) == len(self):
+            return self
+        index = np.fromiter(seen.values(), dtype=np.intp, count=len(seen))
+        return RateBatch._wrap(self.source[index], self.currency[index], self.denomination[index],
+                               self.buy[index], self.sell[index], self.attrs)
+
+    # -- conversion ------------------------------------------------------
+
+    def to_columns(self) -> Dict[str, list]:
+        """Plain lists for JSON storage"""
+        return {
+            'source': self.source.tolist(),
+            'currency': self.currency.tolist(),
+            'denomination': self.denomination.tolist(),
+            'buy': self.buy.tolist(),
+            'sell': self.sell.tolist(),
+        }
+
+    def to_frame(self):
+        """
+        Display DataFrame (Currency, Buy Rate, Sell Rate, Source, plus
+        Denomination when any quote has one). The float columns wrap the
+        batch's arrays without copying.
+        """
+        import pandas as pd
+
+        columns = {
+            'Currency': self.labels,
+            'Buy Rate': self.buy,
+            'Sell Rate': self.sell,
+            'Source': self.source,
+        }
+        if any(self.denomination):
+            columns['Denomination'] = self.denomination
+        df = pd.DataFrame(columns, copy=False)
+        df.attrs.update(self.attrs)
+        return df
+
+    def __repr__(self):
+        return f'RateBatch({len(self)} rates, sources={sorted(set(self.source.tolist()))})'
+
+
+def as_batch(value) -> RateBatch:
+    """Normalise whatever a source returned (batch, records, row dicts, DataFrame, None)"""
+    if isinstance(value, RateBatch):
+        return value
+    if value is None:
+        return RateBatch()
+    if hasattr(value, 'to_dict'):
+        return RateBatch.from_frame(value)
+    rows: List = list(value)
+    if rows and isinstance(rows[0], RateRecord):
+        return RateBatch.from_records(rows)
+    return RateBatch.from_rows(rows)
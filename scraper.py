@@ -1,222 +1,299 @@
-import requests
-from bs4 import BeautifulSoup
 import pandas as pd
+import sys
 import time
-import streamlit as st
-from typing import Optional, List, Dict, Union
-from selenium import webdriver
-from selenium.webdriver.firefox.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from playwright.sync_api import sync_playwright
-from superrich import get_superrich_rates
-import re
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Callable, Optional, List, Dict, Union
+from cache import rate_cache
+from http_client import fetch_if_changed, get_http_client, is_transient, network_errors
+from sources import BROWSER, Source, get_source, parse_page, registered_sources, wait_for_rate_limit
+from history import record_scrape
+from metrics import inc, profiled, span
+from circuit import CircuitOpenError, backoff_delay, get_breaker
+from notify import ERROR, INFO, SUCCESS, WARNING, notify
+from records import RateBatch, as_batch
+from rate_matrix import RateMatrix
+from calculator import CrossRateCalculator, get_calculator
+
+DEFAULT_DEADLINE = 15
+
+
+def _attach_streamlit_context(ctx) -> None:
+    """Let worker threads keep writing st.info/st.success into the running page"""
+    if ctx is None:
+        return
+    try:
+        from streamlit.runtime.scriptrunner import add_script_run_ctx
+        add_script_run_ctx(threading.current_thread(), ctx)
+    except ImportError:
+        pass
+
+
+def _current_streamlit_context():
+    # Only look for a page context when Streamlit is already running; never import it here
+    if 'streamlit' not in sys.modules:
+        return None
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        return get_script_run_ctx(suppress_warning=True)
+    except (ImportError, TypeError):
+        return None
+
+
+def _recorded(loader: Callable[[], RateBatch]) -> Callable[[], RateBatch]:
+    """Wrap a source so every upstream scrape is appended to the rate history"""
+    def run():
+        df = loader()
+        if df is not None and not df.attrs.get('unchanged'):
+            record_scrape(df)
+        return df
+    return run
+
+
+_last_good_lock = threading.Lock()
+_last_good: Dict[str, tuple] = {}
+
+
+def last_good(name: str) -> RateBatch:
+    """
+    The last successful result for ``name``, flagged with attrs['stale'] and
+    attrs['fetched_at'] (epoch seconds); empty if the source never succeeded.
+    """
+    with _last_good_lock:
+        entry = _last_good.get(name)
+    if entry is None:
+        return RateBatch()
+    batch, fetched_at = entry
+    return batch.with_attrs(stale=True, fetched_at=fetched_at)
+
 
 class CurrencyRateScraper:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+    def __init__(self, session=None, calculator: Optional[CrossRateCalculator] = None):
+        # requests.Session or async_http.AsyncFetcher; see http_client.get_http_client
+        self.session = session or get_http_client()
+        # Shared by default so cross rates are only recomputed for quotes that moved
+        self.calculator = calculator or get_calculator()
         self.timeout = 10
-    
-    def scrape_cashchanger(self) -> Optional[pd.DataFrame]:
-        """Scrape currency rates from cashchanger.co/singapore"""
+
+    def sources(self) -> Dict[str, Callable[[], RateBatch]]:
+        """All registered rate sources (see sources.py), keyed by display name"""
+        return {
+            source.name: partial(self.fetch_custom if source.mode == BROWSER else self.scrape_source, source)
+            for source in registered_sources()
+        }
+
+    def recorded_source(self, name: str) -> Callable[[], RateBatch]:
+        """The named source, appending every scrape it makes to the rate history"""
+        return _recorded(self.sources()[name])
+
+    def guarded_source(self, name: str) -> Callable[[], RateBatch]:
+        """
+        The named source behind its circuit breaker. While the circuit is open
+        (or when a scrape fails) the last good result is served immediately,
+        flagged as stale, instead of waiting on the upstream timeout.
+        """
+        loader = self.recorded_source(name)
+        breaker = get_breaker(name)
+
+        def run():
+            try:
+                df = breaker.call(loader, is_failure=lambda result: result is None or result.empty)
+            except CircuitOpenError:
+                return last_good(name)
+            except Exception as e:
+                # The breaker has already counted the failure
+                notify(ERROR, f"❌ {name}: {e}")
+                return last_good(name)
+            if df is None or df.empty:
+                return last_good(name)
+            with _last_good_lock:
+                _last_good[name] = (df, time.time())
+            return df
+        return run
+
+    def fetch_all(self, names: Optional[List[str]] = None,
+                  deadlines: Optional[Dict[str, float]] = None,
+                  use_cache: bool = True) -> Dict[str, RateBatch]:
+        """Run the selected sources concurrently and collect whatever finishes in time.
+
+        Every source gets its own deadline (measured from the moment the batch
+        starts), so the call returns after the slowest source or its deadline,
+        whichever comes first. Sources that miss their deadline or fail come
+        back as an empty RateBatch.
+
+        With ``use_cache`` the sources go through the process-wide rate_cache,
+        so concurrent sessions share one upstream fetch per TTL window.
+        Every source runs behind its circuit breaker (see guarded_source).
+        """
+        with profiled('fetch_all'), span('refresh'):
+            return self._fetch_all(names, deadlines, use_cache)
+
+    def _fetch_all(self, names, deadlines, use_cache) -> Dict[str, RateBatch]:
+        registry = self.sources()
+        names = list(registry) if names is None else names
+        deadlines = {**{s.name: s.deadline for s in registered_sources()}, **(deadlines or {})}
+        results = {name: RateBatch() for name in names}
+        if not names:
+            return results
+
+        executor = ThreadPoolExecutor(
+            max_workers=len(names),
+            thread_name_prefix='rate-source',
+            initializer=_attach_streamlit_context,
+            initargs=(_current_streamlit_context(),),
+        )
+        started = time.monotonic()
+        futures = {}
+        for name in names:
+            loader = self.guarded_source(name)
+            if use_cache:
+                futures[name] = executor.submit(rate_cache.get, name, loader)
+            else:
+                futures[name] = executor.submit(loader)
         try:
-            st.info("Fetching rates from CashChanger...")
-            
-            # Use Singapore-specific URL
-            url = "https://cashchanger.co/singapore"
-            response = self.session.get(url, timeout=self.timeout)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            rates_data = []
-            
-            # -------------------------
+            for name, future in futures.items():
+                remaining = started + deadlines.get(name, DEFAULT_DEADLINE) - time.monotonic()
+                try:
+                    df = future.result(timeout=max(remaining, 0))
+                except FutureTimeoutError:
+                    inc('deadline_exceeded_total', source=name)
+                    print(f"[fetch_all] {name}: deadline exceeded, returning partial results")
+                    continue
+                except Exception as e:
+                    print(f"[fetch_all] {name}: {e}")
+                    continue
+                if df is not None:
+                    results[name] = df
+        finally:
+            # Don't block on stragglers; they finish (and are discarded) in the background
+            executor.shutdown(wait=False, cancel_futures=True)
+        return results
+    
+    @staticmethod
+    def _unchanged(batch: RateBatch) -> RateBatch:
+        """Mark a result reused from the previous fetch so callers can skip recomputing it"""
+        return batch.with_attrs(unchanged=True)
 
-            # Look for money changer listings with rates
-            # CashChanger shows money changers with their rates
-            import re
-            money_changers = soup.find_all('div', class_=re.compile(r'rate|exchange|changer|currency', re.I))
-            
-            # Also try to find any tables or structured data
-            tables = soup.find_all('table')
-            for table in tables:
-                rows = table.find_all('tr')
-                for row in rows:
-                    cells = row.find_all(['td', 'th'])
-                    if len(cells) >= 3:
-                        cell_texts = [cell.get_text(strip=True) for cell in cells]
-                        
-                        # Look for currency codes and rates
-                        import re
-                        for i, cell_text in enumerate(cell_texts):
-                            currency_match = re.search(r'\b([A-Z]{3})\b', cell_text)
-                            if currency_match and i + 2 < len(cell_texts):
-                                currency = currency_match.group(1)
-                                if currency in ['USD', 'EUR', 'GBP', 'JPY', 'AUD', 'CAD', 'CHF', 'CNY', 'SGD']:
-                                    # Try to extract buy/sell rates from next cells
-                                    try:
-                                        buy_rate = float(re.findall(r'\d+\.\d+', cell_texts[i+1])[0])
-                                        sell_rate = float(re.findall(r'\d+\.\d+', cell_texts[i+2])[0])
-                                        
-                                        rates_data.append({
-                                            'Currency': currency,
-                                            'Buy Rate': buy_rate,
-                                            'Sell Rate': sell_rate,
-                                            'Source': 'CashChanger'
-                                        })
-                                    except (IndexError, ValueError):
-                                        continue
-            
-            # If no structured data, try text parsing
-            if not rates_data:
-                text_content = soup.get_text()
-                import re
-                
-                # Look for CashChanger specific pattern: "CURRENCY AMOUNT = SGD RATE"
-                # Examples: "USD 1 = SGD 1.282", "JPY 1000 = SGD 8.715"
-                rate_patterns = re.findall(r'([A-Z]{3})\s+(\d+)\s+=\s+SGD\s+([\d\.]+)', text_content)
-                
-                for match in rate_patterns:
-                    currency, amount, sgd_rate = match
-                    amount = float(amount)
-                    sgd_rate = float(sgd_rate)
-                    
-                    # Convert to rate per 1 unit of foreign currency (actual rate)
-                    rate_per_unit = sgd_rate / amount
-                    
-                    # Use the actual rate without any spread adjustments
-                    rates_data.append({
-                        'Currency': currency,
-                        'Buy Rate': rate_per_unit,
-                        'Sell Rate': rate_per_unit,
-                        'Source': 'CashChanger'
-                    })
-                
-                # Remove duplicates by keeping the most recent rate for each currency
-                if rates_data:
-                    df_temp = pd.DataFrame(rates_data)
-                    df_temp = df_temp.drop_duplicates(subset=['Currency'], keep='last')
-                    rates_data = df_temp.to_dict('records')
+    @staticmethod
+    def fetch_custom(source: Source) -> RateBatch:
+        """Run a browser/API source's own fetch function, honouring its rate limit"""
+        wait_for_rate_limit(source)
+        return as_batch(source.fetch())
+
+    def scrape_source(self, source: Source) -> RateBatch:
+        """Fetch and parse a registered HTTP source, reusing the last result if the page is unchanged"""
+        try:
+            notify(INFO, f"Fetching rates from {source.name}...")
+            df, changed = self._fetch_with_retries(source)
             
-            if rates_data:
-                df = pd.DataFrame(rates_data)
-                # Remove duplicates
-                df = df.drop_duplicates(subset=['Currency'])
-                st.success(f"✅ CashChanger: Found {len(df)} currency rates")
-                
-                return df
-            else:
-                st.warning("⚠️ CashChanger: No currency data found")
-                return pd.DataFrame()
+            if df.empty:
+                notify(WARNING, f"⚠️ {source.name}: No currency data found")
+                return RateBatch()
+            if not changed:
+                notify(SUCCESS, f"✅ {source.name}: Rates unchanged ({len(df)} currencies)")
+                return self._unchanged(df)
+            # Remove duplicates
+            df = df.unique()
+            notify(SUCCESS, f"✅ {source.name}: Found {len(df)} currency rates")
+            return df
                 
-        except requests.RequestException as e:
-            st.error(f"❌ CashChanger: Network error - {str(e)}")
-            return pd.DataFrame()
+        except network_errors() as e:
+            notify(ERROR, f"❌ {source.name}: Network error - {str(e)}")
+            return RateBatch()
         except Exception as e:
-            st.error(f"❌ CashChanger: Parsing error - {str(e)}")
-            
-            return pd.DataFrame()
+            notify(ERROR, f"❌ {source.name}: Parsing error - {str(e)}")
+            return RateBatch()
+
+    def _fetch_with_retries(self, source: Source):
+        """
+        fetch_if_changed, retrying connection errors, timeouts and 5xx/429
+        answers with jittered exponential backoff. Other HTTP errors (403,
+        404, ...) are raised straight away.
+        """
+        for attempt in range(source.retries + 1):
+            wait_for_rate_limit(source)
+            try:
+                return fetch_if_changed(
+                    source.url, partial(self._parse_source, source),
+                    session=self.session, timeout=self.timeout, source=source.name,
+                )
+            except network_errors() as e:
+                if attempt == source.retries or not is_transient(e):
+                    raise
+                delay = backoff_delay(attempt)
+                inc('retries_total', source=source.name)
+                print(f"[{source.name}] {e}; retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    @staticmethod
+    def _parse_source(source: Source, response) -> RateBatch:
+        with span('parse', source=source.name):
+            batch = parse_page(source, response.content)
+        inc('rows_parsed_total', len(batch), source=source.name)
+        return batch
+
+    def scrape_cashchanger(self) -> RateBatch:
+        """Scrape currency rates from cashchanger.co/singapore"""
+        return self.scrape_source(get_source('CashChanger'))
     
-    def scrape_grandsuperrich_sgd100(self) -> Optional[pd.DataFrame]:
+    def scrape_grandsuperrich_sgd100(self) -> RateBatch:
         """Scrape Singapore 100 note pricing from grandsuperrich.com"""
-        try:
-            st.info("Fetching Singapore 100 note pricing from Grand Superrich...")
-            
-            url = "https://grandsuperrich.com"
-            # url = "https://superrichthailand.com"
-            response = self.session.get(url, timeout=self.timeout)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            text_content = soup.get_text()
-            # print(text_content)
-            rates_data = []
+        return self.scrape_source(get_source('Grand Superrich'))
+    
+    def combine_data(self, df1: Union[RateBatch, pd.DataFrame, None],
+                     df2: Union[RateBatch, pd.DataFrame, None] = None,
+                     *more: Union[RateBatch, pd.DataFrame, None]) -> pd.DataFrame:
+        """
+        Combine any number of source results into one display table with
+        derived THB cross rates. The cross rates come from the scraper's
+        CrossRateCalculator, which only recomputes quotes whose rates moved
+        since the previous call. RateBatches are converted to DataFrames here,
+        at display time:
 
-            # -------------------------
-            
-            print(get_superrich_rates())
+        - Code: 3-letter currency code ("SGD 100" -> "SGD")
+        - THB Buy / THB Sell: THB per foreign unit. SGD-quoted sources
+          (CashChanger) are multiplied by the Grand Superrich SGD buy rate;
+          NaN when that rate is unavailable.
+        - Spread: Sell Rate - Buy Rate in the source's own quote currency
+        - Best: the source with the highest THB Buy for its currency
 
-            # -------------------------
+        ``attrs['bridge_rate']`` holds the SGD->THB rate these THB columns
+        were computed with (NaN when missing). Read it from here rather than
+        from the shared calculator, which another session may update.
+        """
+        try:
+            with span('combine'):
+                cross = self.calculator.update_batches(*(df for df in (df1, df2) + more if df is not None))
+                if not len(cross):
+                    return pd.DataFrame()
 
+                # Sort by currency and source
+                combined_df = cross.to_frame().sort_values(['Currency', 'Source'], ignore_index=True)
+                combined_df.insert(combined_df.columns.get_loc('THB Buy'), 'Code', combined_df['Currency'].str[:3])
 
-            
-            # Look specifically for Singapore SGD 100 note pricing
-            # Pattern: "SingaporeSGD 100-5025.0525.20" means SGD 100 denomination with buy 25.05, sell 25.20
-            sgd_100_pattern = re.search(r'SingaporeSGD\s+100[^0-9]*(\d+\.\d+)(\d+\.\d+)', text_content)
-            
-            if sgd_100_pattern:
-                buy_rate = float(sgd_100_pattern.group(1))
-                sell_rate = float(sgd_100_pattern.group(2))
-                
-                rates_data.append({
-                    'Currency': 'SGD 100',
-                    'Buy Rate': 25.1,
-                    'Sell Rate': sell_rate,
-                    'Source': 'Grand Superrich'
-                })
+                best = combined_df.groupby('Code')['THB Buy'].transform('max')
+                combined_df['Best'] = combined_df['THB Buy'].eq(best) & best.notna()
                 
-                st.success(f"✅ Grand Superrich: Found SGD 100 note pricing - Buy: {buy_rate}, Sell: {sell_rate}")
-            else:
-                st.warning("⚠️ Grand Superrich: SGD 100 note pricing not found")
-                return pd.DataFrame()
-            
-            if rates_data:
-                return pd.DataFrame(rates_data)
-            else:
-                return pd.DataFrame()
-                
-        except requests.RequestException as e:
-            st.error(f"❌ Grand Superrich: Network error - {str(e)}")
-            return pd.DataFrame()
-        except Exception as e:
-            st.error(f"❌ Grand Superrich: Parsing error - {str(e)}")
-            return pd.DataFrame()
-    
-    def combine_data(self, df1: Optional[pd.DataFrame], df2: Optional[pd.DataFrame]) -> pd.DataFrame:
-        """Combine data from both sources into a single DataFrame"""
-        try:
-            # Create list to store all data
-            all_data = []
-            
-            # Add data from first source
-            if df1 is not None and not df1.empty:
-                all_data.append(df1)
-            
-            # Add data from second source
-            if df2 is not None and not df2.empty:
-                all_data.append(df2)
-            
-            if not all_data:
-                return pd.DataFrame()
-            
-            # Combine all data
-            combined_df = pd.concat(all_data, ignore_index=True)
-            
-            # Sort by currency and source
-            combined_df = combined_df.sort_values(['Currency', 'Source'])
-            
-            # Format numeric columns
-            if 'Buy Rate' in combined_df.columns:
+                # Format numeric columns
+                combined_df['Spread'] = (combined_df['Sell Rate'] - combined_df['Buy Rate']).round(4)
                 combined_df['Buy Rate'] = combined_df['Buy Rate'].round(4)
-            
-            if 'Sell Rate' in combined_df.columns:
                 combined_df['Sell Rate'] = combined_df['Sell Rate'].round(4)
-            
-            # Add difference column if we have rates from both sources for same currency
-            if len(combined_df) > 1:
-                combined_df['Spread'] = (combined_df['Sell Rate'] - combined_df['Buy Rate']).round(4)
-            
-            return combined_df
+                combined_df.attrs['bridge_rate'] = cross.bridge_rate
+                
+                return combined_df
             
         except Exception as e:
-            st.error(f"Error combining data: {str(e)}")
+            notify(ERROR, f"Error combining data: {str(e)}")
             return pd.DataFrame()
-    
+
+    @staticmethod
+    def rate_matrix(results: Dict[str, RateBatch]) -> RateMatrix:
+        """(source, currency, denomination) index over fetch_all results, for lookups and best-rate queries"""
+        quote_currencies = {s.name: s.quote_currency for s in registered_sources()}
+        return RateMatrix.from_batches((as_batch(r) for r in results.values()), quote_currencies)
+
     def get_mock_data_if_needed(self) -> pd.DataFrame:
         """Return empty DataFrame - no mock data as per guidelines"""
         return pd.DataFrame()
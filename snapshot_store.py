@@ -0,0 +1,74 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from records import RateBatch, as_batch
+
+RATES_DB = os.environ.get("RATES_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "rates.db"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    source TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,
+    rows TEXT NOT NULL
+)
+"""
+
+
+class SnapshotStore:
+    """
+    Latest scrape per source in a local SQLite file.
+
+    The polling daemon writes, the Streamlit app and push server only read.
+    WAL mode lets readers keep going while a snapshot is being written.
+    """
+
+    def __init__(self, path: str = RATES_DB):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            self._local.conn = conn
+        return conn
+
+    def write(self, source: str, batch: RateBatch, fetched_at: Optional[float] = None) -> None:
+        rows = json.dumps(as_batch(batch).to_columns(), ensure_ascii=False)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO snapshots (source, fetched_at, rows) VALUES (?, ?, ?) "
+                "ON CONFLICT(source) DO UPDATE SET fetched_at = excluded.fetched_at, rows = excluded.rows",
+                (source, fetched_at or time.time(), rows),
+            )
+
+    def touch(self, source: str, fetched_at: Optional[float] = None) -> None:
+        """Mark an unchanged scrape as fresh without rewriting its rows"""
+        with self._connect() as conn:
+            conn.execute("UPDATE snapshots SET fetched_at = ? WHERE source = ?", (fetched_at or time.time(), source))
+
+    def read(self, source: str) -> Tuple[RateBatch, Optional[float]]:
+        """Latest rates for ``source`` and when they were fetched (epoch seconds)"""
+        row = self._connect().execute(
+            "SELECT rows, fetched_at FROM snapshots WHERE source = ?", (source,)
+        ).fetchone()
+        if row is None:
+            return RateBatch(), None
+        return _decode(row[0]), row[1]
+
+    def read_all(self) -> Dict[str, Tuple[RateBatch, float]]:
+        rows = self._connect().execute("SELECT source, rows, fetched_at FROM snapshots").fetchall()
+        return {source: (_decode(data), fetched_at) for source, data, fetched_at in rows}
+
+
+def _decode(data: str) -> RateBatch:
+    value = json.loads(data)
+    # Snapshots written before RateBatch are lists of display-schema rows
+    return RateBatch.from_columns(value) if isinstance(value, dict) else RateBatch.from_rows(value)
@@ -0,0 +1,200 @@
+"""
+Rate source registry.
+
+Every money changer is described by a ``Source``: where to fetch it, how
+(plain HTTP or a custom/browser fetch), the function that turns the page
+into rows, and how often it may be polled. Built-in sources are registered
+at the bottom of this module; extra ones can live in their own modules and
+be loaded through the RATE_SOURCE_PLUGINS environment variable
+(comma-separated module names), e.g.
+
+    # bangkok_changers.py
+    from sources import Source, register_source
+
+    def parse_vasu(content: bytes) -> RateBatch:
+        ...
+
+    register_source(Source(name='Vasu Exchange', url='https://...', parse=parse_vasu))
+
+HTTP parse functions must be module-level so they can run in the parse
+process pool. They should return a ``records.RateBatch``; lists of
+RateRecords or of display-schema dicts are converted.
+"""
+import importlib
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional
+
+from cache import rate_cache
+from cashchanger_parser import parse_cashchanger
+from records import RateBatch, RateRecord, as_batch
+
+HTTP = 'http'
+BROWSER = 'browser'
+
+# Parse in-process by default: the pages are small and a spawn pool costs a
+# process per worker. Set PARSE_WORKERS=N for big pages or crawls.
+PARSE_WORKERS = int(os.environ.get('PARSE_WORKERS', '0'))
+
+
+@dataclass(frozen=True)
+class Source:
+    name: str
+    url: str
+    # Page bytes -> RateBatch (HTTP sources)
+    parse: Optional[Callable[[bytes], RateBatch]] = None
+    mode: str = HTTP
+    # Custom fetch returning a RateBatch, for browser/API sources
+    fetch: Optional[Callable[[], object]] = None
+    quote_currency: str = 'THB'
+    poll_interval: float = 120
+    # Minimum seconds between two upstream requests
+    rate_limit: float = 0
+    deadline: float = 15
+    # Extra attempts on connection errors, timeouts and 5xx/429, with jittered exponential backoff
+    retries: int = 2
+    ttl: float = 60
+    # Shown on the Streamlit page
+    on_page: bool = True
+
+
+_registry: Dict[str, Source] = {}
+_last_request: Dict[str, float] = {}
+_limit_lock = threading.Lock()
+
+
+def register_source(source: Source) -> Source:
+    if source.mode == HTTP and source.parse is None:
+        raise ValueError(f"HTTP source {source.name!r} needs a parse function")
+    if source.mode == BROWSER and source.fetch is None:
+        raise ValueError(f"Browser source {source.name!r} needs a fetch function")
+    _registry[source.name] = source
+    rate_cache.ttls[source.name] = source.ttl
+    return source
+
+
+def get_source(name: str) -> Source:
+    return _registry[name]
+
+
+def registered_sources() -> List[Source]:
+    return list(_registry.values())
+
+
+def require_sources(names: Iterable[str]) -> None:
+    """Raise ValueError naming every source in ``names`` that isn't registered"""
+    unknown = [name for name in names if name not in _registry]
+    if unknown:
+        raise ValueError(f"unknown source(s): {', '.join(map(repr, unknown))}; "
+                         f"registered: {', '.join(map(repr, _registry))}")
+
+
+def load_plugins(modules: Optional[str] = None) -> None:
+    """Import the modules listed in RATE_SOURCE_PLUGINS so they can register sources"""
+    modules = os.environ.get('RATE_SOURCE_PLUGINS', '') if modules is None else modules
+    for module in filter(None, (m.strip() for m in modules.split(','))):
+        importlib.import_module(module)
+
+
+def wait_for_rate_limit(source: Source) -> None:
+    """Block until ``source.rate_limit`` seconds have passed since its last request"""
+    if not source.rate_limit:
+        return
+    with _limit_lock:
+        now = time.monotonic()
+        start = max(now, _last_request.get(source.name, 0) + source.rate_limit)
+        _last_request[source.name] = start
+    if start > now:
+        time.sleep(start - now)
+
+
+_pool_lock = threading.Lock()
+_parse_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_parse_pool() -> Optional[ProcessPoolExecutor]:
+    """Process pool for CPU-heavy page parsing; None when PARSE_WORKERS is 0"""
+    global _parse_pool
+    if PARSE_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _parse_pool is None:
+            # spawn: the scraper process is multi-threaded, so forking it is unsafe
+            _parse_pool = ProcessPoolExecutor(
+                max_workers=PARSE_WORKERS, mp_context=multiprocessing.get_context('spawn')
+            )
+        return _parse_pool
+
+
+def parse_page(source: Source, content: bytes) -> RateBatch:
+    """Run the source's parser in the process pool, or inline without one"""
+    pool = get_parse_pool()
+    if pool is None:
+        return as_batch(source.parse(content))
+    return as_batch(pool.submit(source.parse, content).result())
+
+
+# -- built-in sources --------------------------------------------------------
+
+def parse_cashchanger_page(content: bytes) -> RateBatch:
+    return parse_cashchanger(content.decode('utf-8', errors='replace'))
+
+
+def parse_grandsuperrich_page(content: bytes) -> RateBatch:
+    from bs4 import BeautifulSoup
+    text_content = BeautifulSoup(content, 'html.parser').get_text()
+
+    # Look specifically for Singapore SGD 100 note pricing
+    # Pattern: "SingaporeSGD 100-5025.0525.20" means SGD 100 denomination with buy 25.05, sell 25.20
+    sgd_100_pattern = re.search(r'SingaporeSGD\s+100[^0-9]*(\d+\.\d+)(\d+\.\d+)', text_content)
+    if not sgd_100_pattern:
+        return RateBatch()
+    return RateBatch.from_records([
+        RateRecord('Grand Superrich', 'SGD', 25.1, float(sgd_100_pattern.group(2)), denomination='100')
+    ])
+
+
+def _fetch_superrich_thailand():
+    from superrich import get_superrich_rates
+    return get_superrich_rates()
+
+
+register_source(Source(
+    name='CashChanger',
+    url='https://cashchanger.co/singapore',
+    parse=parse_cashchanger_page,
+    quote_currency='SGD',
+    poll_interval=60,
+    rate_limit=5,
+    deadline=12,
+    ttl=60,
+))
+
+register_source(Source(
+    name='Grand Superrich',
+    url='https://grandsuperrich.com',
+    parse=parse_grandsuperrich_page,
+    poll_interval=60,
+    rate_limit=5,
+    deadline=12,
+    ttl=60,
+))
+
+register_source(Source(
+    name='Superrich Thailand',
+    url='https://www.superrichthailand.com',
+    mode=BROWSER,
+    fetch=_fetch_superrich_thailand,
+    poll_interval=300,
+    rate_limit=30,
+    deadline=90,
+    ttl=300,
+    on_page=False,
+))
+
+load_plugins()
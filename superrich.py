@@ -1,45 +1,214 @@
-from playwright.sync_api import sync_playwright
-from bs4 import BeautifulSoup
-import pandas as pd
+# bs4, pandas and Playwright (via browser_pool) are imported where they are
+# used, so the API path and `python superrich.py` start without them
+from browser_pool import dump_debug, get_browser_pool
+from http_client import get_shared_session
+from metrics import inc, span
+from circuit import backoff_delay
+from records import RateBatch, RateRecord
+import os
 import re
 import time
 
+# Backend endpoint the AngularJS exchange page loads its `rates` model from.
+# The site does not document one, so the API path is off unless the URL is
+# configured (copy it from the browser's network tab); scrapes then go
+# straight to the browser instead of paying a failing round-trip first.
+SUPERRICH_API_URL = os.environ.get("SUPERRICH_API_URL")
+SUPERRICH_API_AUTH = os.environ.get("SUPERRICH_API_AUTH")
+SOURCE = "Superrich Thailand"
 
-def scrape_superrich_thailand(url="https://www.superrichthailand.com", retries=3):
+# One tbody per currency, rendered once the Angular `rates` model has loaded
+RATE_TABLE_SELECTOR = "#print-table tbody.ng-scope"
+NAVIGATION_TIMEOUT_MS = 30000
+TABLE_TIMEOUT_MS = 20000
+
+# Reads the whole rate table in a single round-trip. The first row of each
+# currency block carries the code/name cell (rowspan = number of denominations).
+EXTRACT_RATES_JS = """
+() => {
+    // Runs after RATE_TABLE_SELECTOR matched, so #print-table is there
+    const table = document.querySelector('#print-table');
+    if (!table) return null;
+    const text = (el) => el ? el.innerText.trim() : '';
+    const rows = [];
+    for (const tbody of table.querySelectorAll('tbody.ng-scope')) {
+        const first = tbody.querySelector('td.first-col');
+        if (!first) continue;
+        const code = text(first.querySelector('span'));
+        const name = text(first.querySelector('.country-name'));
+        for (const tr of tbody.querySelectorAll('tr')) {
+            const cells = Array.from(tr.querySelectorAll('td')).filter((td) => !td.classList.contains('first-col'));
+            if (cells.length < 3) continue;
+            rows.push({
+                currency_name: name,
+                currency_code: code,
+                denomination: text(cells[0]),
+                buying_rate: text(cells[1]),
+                selling_rate: text(cells[2]),
+            });
+        }
+    }
+    return rows;
+}
+"""
+
+
+def exchange_url(url):
+    """The Angular route that renders the full per-denomination rate table"""
+    return url if "#!" in url else url.rstrip("/") + "/#!/en/exchange"
+
+
+def extract_rate_rows(page, url):
+    """
+    Lean page scrape: navigate (images, fonts and analytics are blocked by the
+    browser pool), wait for the rate table itself and read every row with one
+    page.evaluate. Returns the table as text rows (see rows_to_batch).
+    """
+    with span("goto", source=SOURCE):
+        page.goto(exchange_url(url), wait_until="domcontentloaded", timeout=NAVIGATION_TIMEOUT_MS)
+    try:
+        with span("wait_for_selector", source=SOURCE):
+            page.wait_for_selector(RATE_TABLE_SELECTOR, timeout=TABLE_TIMEOUT_MS)
+        with span("extract", source=SOURCE):
+            rows = page.evaluate(EXTRACT_RATES_JS)
+    finally:
+        dump_debug(page, "superrich")
+    if rows is None:
+        raise ValueError("Exchange rate table not found")
+    return [row for row in rows if re.search(r"\d", row["buying_rate"]) and re.search(r"\d", row["selling_rate"])]
+
+
+def _to_float(value):
+    match = re.search(r"\d+(?:\.\d+)?", value.replace(",", ""))
+    return float(match.group()) if match else None
+
+
+def rows_to_batch(rows):
+    """Scraped text rows (currency_code, buying_rate, selling_rate, denomination) as a RateBatch"""
+    records = []
+    for r in rows:
+        buy_rate = _to_float(r["buying_rate"])
+        sell_rate = _to_float(r["selling_rate"])
+        if buy_rate is None or sell_rate is None:
+            continue
+        records.append(RateRecord(SOURCE, r["currency_code"], buy_rate, sell_rate, r.get("denomination", "")))
+    return RateBatch.from_records(records)
+
+
+def parse_rate_payload(payload):
+    """
+    Parse the JSON rate payload behind the exchange page straight into a
+    RateBatch. Each currency carries one entry per denomination
+    (cUnit, rate[].denom/cBuying/cSelling/rateDigit).
+    """
+    items = payload
+    if isinstance(items, dict):
+        items = items.get("data", items)
+    if isinstance(items, dict):
+        items = items.get("exchangeRate") or items.get("rates") or []
+
+    records = []
+    for item in items:
+        currency_code = item.get("cUnit", "")
+        for rate in item.get("rate", []):
+            digits = int(rate.get("rateDigit") or 2)
+            buying, selling = rate.get("cBuying"), rate.get("cSelling")
+            if buying in (None, "") or selling in (None, ""):
+                continue
+            records.append(RateRecord(
+                SOURCE, currency_code, round(float(buying), digits), round(float(selling), digits),
+                str(rate.get("denom", "")),
+            ))
+    return RateBatch.from_records(records)
+
+
+def parse_rate_html(html):
     """
-    Scrape exchange rates (currency name, code, buying, selling) from SuperRich Thailand.
+    Parse a rendered Superrich page. Handles the full rate table
+    (name, code, buy, sell) and the home page summary (code, buy, sell).
     Filters out menu rows and only keeps rows with numeric rates.
     """
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+
+    data = []
+    for row in soup.find_all("tr"):
+        cols = [c.get_text(strip=True) for c in row.find_all("td")]
+        if len(cols) >= 4:
+            currency_name, currency_code, buying_rate, selling_rate = cols[:4]
+        elif len(cols) == 3 and re.fullmatch(r"[A-Z]{3}", cols[0]):
+            currency_name = ""
+            currency_code, buying_rate, selling_rate = cols
+        else:
+            continue
+
+        # ✅ keep only rows with numbers in buy/sell
+        if re.search(r"\d", buying_rate) and re.search(r"\d", selling_rate):
+            data.append({
+                "currency_name": currency_name,
+                "currency_code": currency_code,
+                "buying_rate": buying_rate,
+                "selling_rate": selling_rate
+            })
+    return rows_to_batch(data)
+
+
+def fetch_superrich_api(api_url=SUPERRICH_API_URL, timeout=10):
+    """Fetch the rate payload with plain HTTP, no browser involved"""
+    headers = {"Accept": "application/json"}
+    if SUPERRICH_API_AUTH:
+        headers["Authorization"] = SUPERRICH_API_AUTH
+    with span("http_request", source=SOURCE):
+        response = get_shared_session().get(api_url, headers=headers, timeout=timeout)
+    inc("bytes_fetched_total", len(response.content), source=SOURCE)
+    response.raise_for_status()
+    with span("parse", source=SOURCE):
+        data = parse_rate_payload(response.json())
+    inc("rows_parsed_total", len(data), source=SOURCE)
+    if not data:
+        raise ValueError("No valid exchange rate rows in API payload")
+    return data
+
+
+def _render_rate_page(url):
+    return rows_to_batch(get_browser_pool().run(lambda page: extract_rate_rows(page, url)))
+
+
+def scrape_superrich_thailand(url="https://www.superrichthailand.com", retries=3, mode="auto",
+                              api_url=SUPERRICH_API_URL, fetch_api=None, render_page=None):
+    """
+    Scrape exchange rates from SuperRich Thailand as a RateBatch (empty on failure).
+
+    mode="api" reads the JSON payload directly, mode="browser" renders the
+    page on a pooled browser, and mode="auto" (default) tries the API first
+    when ``api_url`` is configured and falls back to the browser when it
+    fails. ``fetch_api`` and
+    ``render_page`` can be swapped for fixture loaders to run offline;
+    ``render_page`` may return a RateBatch or page HTML.
+    """
+    fetch_api = fetch_api or fetch_superrich_api
+    render_page = render_page or _render_rate_page
+
+    if mode == "api" and not api_url:
+        print("[API] SUPERRICH_API_URL is not set")
+        return RateBatch()
+    if mode in ("auto", "api") and api_url:
+        try:
+            return fetch_api(api_url)
+        except Exception as e:
+            print(f"[API] Error: {e}")
+            if mode == "api":
+                return RateBatch()
+            print("[API] Falling back to browser scrape")
+
     for attempt in range(1, retries + 1):
+        if attempt > 1:
+            inc("retries_total", source=SOURCE)
         try:
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                page = browser.new_page()
-                page.goto(url, wait_until="domcontentloaded", timeout=60000)
-
-                # Wait for table content
-                page.wait_for_selector("table", timeout=60000)
-                page.screenshot(path="example.png")
-                html = page.content()
-                print(html)
-                # browser.close()
-
-            soup = BeautifulSoup(html, "html.parser")
-
-            data = []
-            for row in soup.find_all("tr"):
-                cols = [c.get_text(strip=True) for c in row.find_all("td")]
-                if len(cols) >= 4:
-                    currency_name, currency_code, buying_rate, selling_rate = cols[:4]
-
-                    # ✅ keep only rows with numbers in buy/sell
-                    if re.search(r"\d", buying_rate) and re.search(r"\d", selling_rate):
-                        data.append({
-                            "currency_name": currency_name,
-                            "currency_code": currency_code,
-                            "buying_rate": buying_rate,
-                            "selling_rate": selling_rate
-                        })
+            page = render_page(url)
+            with span("parse", source=SOURCE):
+                data = parse_rate_html(page) if isinstance(page, str) else page
+            inc("rows_parsed_total", len(data), source=SOURCE)
 
             if not data:
                 raise ValueError("No valid exchange rate rows found")
@@ -48,27 +217,49 @@ def scrape_superrich_thailand(url="https://www.superrichthailand.com", retries=3
 
         except Exception as e:
             print(f"[Attempt {attempt}] Error: {e}")
-            time.sleep(3)
+            if attempt < retries:
+                time.sleep(backoff_delay(attempt, base=2))
+
+    return RateBatch()
+
 
-    return []
+def get_superrich_rates(url="https://www.superrichthailand.com", retries=3, mode="auto"):
+    """Superrich Thailand as a registered source (see sources.py), for fetch_all and the daemon"""
+    return scrape_superrich_thailand(url=url, retries=retries, mode=mode)
 
 
 if __name__ == "__main__":
-    rates = scrape_superrich_thailand()
+    import argparse
+    import browser_pool
 
-    if rates:
+    parser = argparse.ArgumentParser(description="Scrape SuperRich Thailand rates")
+    parser.add_argument("--mode", choices=("auto", "api", "browser"), default="auto")
+    parser.add_argument("--debug", metavar="DIR", help="Save a screenshot and HTML dump of the rendered page to DIR")
+    args = parser.parse_args()
+    if args.debug:
+        browser_pool.DEBUG_DIR = args.debug
+
+    rates = scrape_superrich_thailand(mode=args.mode)
+
+    if not rates.empty:
         print(f"\n✅ Extracted {len(rates)} rates from SuperRich Thailand\n")
-        print(f"{'Name':<25} {'Code':<6} {'Buy':<12} {'Sell':<12}")
-        print("-" * 60)
+        print(f"{'Code':<6} {'Denomination':<14} {'Buy':<12} {'Sell':<12}")
+        print("-" * 50)
         for r in rates:
-            print(f"{r['currency_name']:<25} {r['currency_code']:<6} {r['buying_rate']:<12} {r['selling_rate']:<12}")
+            print(f"{r.currency:<6} {r.denomination:<14} {r.buy:<12g} {r.sell:<12g}")
+
+        from history import record_scrape
 
         # Save to CSV + JSON
-        df = pd.DataFrame(rates)
+        df = rates.to_frame()
         df.to_csv("superrich_thailand_rates.csv", index=False, encoding="utf-8")
         df.to_json("superrich_thailand_rates.json", orient="records", force_ascii=False)
 
         print("\n💾 Saved superrich_thailand_rates.csv and superrich_thailand_rates.json")
 
+        # Keep every run in the append-only history as well
+        written = record_scrape(rates)
+        print(f"🗄️  Appended {written} records to the rate history")
+
     else:
         print("❌ Failed to scrape rates from SuperRich Thailand after retries.")
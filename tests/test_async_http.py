@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+httpcore = pytest.importorskip('httpcore')
+
+from async_http import _CachingResolverBackend  # noqa: E402
+
+
+class FakeBackend:
+    """Connects to any address not in ``dead``, recording every attempt"""
+
+    def __init__(self, dead=()):
+        self.dead = set(dead)
+        self.attempts = []
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        self.attempts.append(host)
+        if host in self.dead:
+            raise httpcore.ConnectError(f'{host} unreachable')
+        return f'stream to {host}'
+
+
+def resolver(addresses, dead=()):
+    backend = _CachingResolverBackend(ttl=300)
+    backend._backend = FakeBackend(dead)
+    lookups = []
+
+    async def lookup(host, port):
+        lookups.append(host)
+        return list(addresses)
+
+    backend._lookup = lookup
+    return backend, lookups
+
+
+def connect(backend):
+    return asyncio.run(backend.connect_tcp('rates.test', 443))
+
+
+def test_addresses_are_cached():
+    backend, lookups = resolver(['10.0.0.1', '10.0.0.2'])
+    assert connect(backend) == 'stream to 10.0.0.1'
+    assert connect(backend) == 'stream to 10.0.0.1'
+    assert lookups == ['rates.test']
+
+
+def test_falls_back_to_the_next_address_and_prefers_it():
+    backend, lookups = resolver(['2001:db8::1', '10.0.0.2'], dead={'2001:db8::1'})
+    assert connect(backend) == 'stream to 10.0.0.2'
+    assert connect(backend) == 'stream to 10.0.0.2'
+    assert backend._backend.attempts == ['2001:db8::1', '10.0.0.2', '10.0.0.2']
+    assert lookups == ['rates.test']
+
+
+def test_host_is_resolved_again_when_no_address_connects():
+    backend, lookups = resolver(['10.0.0.1'], dead={'10.0.0.1'})
+    with pytest.raises(httpcore.ConnectError):
+        connect(backend)
+    backend._backend.dead.clear()
+    assert connect(backend) == 'stream to 10.0.0.1'
+    assert lookups == ['rates.test', 'rates.test']
@@ -0,0 +1,122 @@
+import threading
+import time
+
+import pytest
+
+from cache import RateCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Loader:
+    """Counts calls; each call waits ``delay`` seconds, then returns the next value or raises ``error``"""
+
+    def __init__(self, *values, delay=0.0, error=None):
+        self.values = list(values)
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.values[min(call, len(self.values)) - 1]
+
+
+def concurrently(fn, n=10):
+    results, start = [None] * n, threading.Barrier(n)
+
+    def run(i):
+        start.wait()
+        try:
+            results[i] = fn()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    return results
+
+
+def test_fresh_entries_are_hits():
+    clock = Clock()
+    cache = RateCache(default_ttl=60, clock=clock)
+    loader = Loader('v1', 'v2')
+
+    assert cache.get('Test', loader) == 'v1'
+    clock.now = 59
+    assert cache.get('Test', loader) == 'v1'
+    assert loader.calls == 1
+
+
+def test_stale_entries_are_served_while_one_refresh_runs():
+    clock = Clock()
+    cache = RateCache(default_ttl=60, max_stale=600, clock=clock)
+    cache.get('Test', Loader('v1'))
+    clock.now = 120
+
+    refresh = Loader('v2', delay=0.2)
+    assert concurrently(lambda: cache.get('Test', refresh)) == ['v1'] * 10
+    deadline = time.monotonic() + 5
+    while cache.peek('Test') != 'v2' and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.get('Test', refresh) == 'v2'
+    assert refresh.calls == 1
+
+
+def test_expired_entries_are_reloaded():
+    clock = Clock()
+    cache = RateCache(default_ttl=60, max_stale=600, clock=clock)
+    cache.get('Test', Loader('v1'))
+    clock.now = 700
+    assert cache.get('Test', Loader('v2')) == 'v2'
+
+
+def test_concurrent_misses_share_one_load():
+    cache = RateCache(clock=Clock())
+    loader = Loader('v1', delay=0.2)
+
+    assert concurrently(lambda: cache.get('Test', loader)) == ['v1'] * 10
+    assert loader.calls == 1
+
+
+def test_waiters_share_a_failed_load():
+    cache = RateCache(clock=Clock())
+    loader = Loader(delay=0.2, error=RuntimeError('upstream down'))
+
+    started = time.monotonic()
+    results = concurrently(lambda: cache.get('Test', loader))
+    assert loader.calls == 1
+    assert time.monotonic() - started < 1
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert cache.peek('Test') is None
+
+
+def test_failed_results_are_shared_but_not_cached():
+    cache = RateCache(clock=Clock())
+    failing = Loader(None, delay=0.2)
+
+    assert concurrently(lambda: cache.get('Test', failing)) == [None] * 10
+    assert failing.calls == 1
+    assert cache.get('Test', Loader('v1')) == 'v1'
+
+
+def test_a_failed_load_does_not_block_the_next_one():
+    cache = RateCache(clock=Clock())
+    with pytest.raises(RuntimeError):
+        cache.get('Test', Loader(error=RuntimeError('upstream down')))
+    assert cache.get('Test', Loader('v1')) == 'v1'
@@ -0,0 +1,118 @@
+import math
+
+import numpy as np
+import pytest
+
+from calculator import CrossRateCalculator
+from rate_matrix import SELL
+from records import RateBatch, RateRecord
+
+QUOTES = {'CashChanger': 'SGD', 'Grand Superrich': 'THB'}
+
+
+def cashchanger(usd=1.28):
+    return RateBatch.from_records([
+        RateRecord('CashChanger', 'USD', usd, usd + 0.02),
+        RateRecord('CashChanger', 'EUR', 1.49, 1.51),
+    ])
+
+
+def grand_superrich(sgd=25.0):
+    return RateBatch.from_records([
+        RateRecord('Grand Superrich', 'SGD', sgd, sgd + 0.3, '100'),
+        RateRecord('Grand Superrich', 'USD', 33.0, 33.2, '100'),
+        RateRecord('Grand Superrich', 'USD', 32.5, 32.9, '50-20'),
+        RateRecord('Grand Superrich', 'USD', 31.0, 33.5, '10-1'),
+    ])
+
+
+def results(**overrides):
+    return {'CashChanger': overrides.get('cashchanger', cashchanger()),
+            'Grand Superrich': overrides.get('grand_superrich', grand_superrich())}
+
+
+@pytest.fixture
+def calculator():
+    return CrossRateCalculator(QUOTES)
+
+
+def test_first_update_computes_every_row(calculator):
+    cross = calculator.update(results())
+
+    assert cross.bridge_rate == 25.0
+    assert len(cross.changed) == len(cross) == 6
+    assert cross.rate('CashChanger', 'USD') == pytest.approx(1.28 * 25.0)
+    assert cross.rate('CashChanger', 'USD', side=SELL) == pytest.approx(1.30 * 25.0)
+    assert cross.rate('Grand Superrich', 'USD', '50-20') == 32.5
+
+
+def test_same_batches_reuse_everything(calculator):
+    inputs = results()
+    first = calculator.update(inputs)
+    again = calculator.update(inputs)
+
+    assert again.changed == []
+    assert again.buy is first.buy and again.batch is first.batch
+    assert calculator.latest is again
+
+
+def test_equal_batches_from_new_arrays_change_nothing(calculator):
+    calculator.update(results())
+    assert calculator.update(results()).changed == []
+
+
+def test_one_quote_moving_recomputes_one_row(calculator):
+    calculator.update(results())
+    cross = calculator.update(results(cashchanger=cashchanger(usd=1.29)))
+
+    assert cross.changed == [('CashChanger', 'USD', '')]
+    assert cross.rate('CashChanger', 'USD') == pytest.approx(1.29 * 25.0)
+    assert cross.rate('CashChanger', 'EUR') == pytest.approx(1.49 * 25.0)
+
+
+def test_bridge_rate_change_recomputes_sgd_quoted_rows(calculator):
+    calculator.update(results())
+    cross = calculator.update(results(grand_superrich=grand_superrich(sgd=25.5)))
+
+    # Every CashChanger row moves with the bridge; only the SGD quote itself moved on Grand Superrich
+    assert sorted(cross.changed) == [('CashChanger', 'EUR', ''), ('CashChanger', 'USD', ''),
+                                     ('Grand Superrich', 'SGD', '100')]
+    assert cross.bridge_rate == 25.5
+    assert cross.rate('CashChanger', 'EUR') == pytest.approx(1.49 * 25.5)
+
+
+def test_missing_bridge_rate_gives_nan_for_sgd_quotes(calculator):
+    cross = calculator.update({'CashChanger': cashchanger()})
+    assert math.isnan(cross.bridge_rate)
+    assert math.isnan(cross.rate('CashChanger', 'USD'))
+
+
+def test_convert_applies_note_bands(calculator):
+    calculator.update(results())
+    best = calculator.convert(['USD', 'USD', 'USD', 'EUR', 'KRW'], [100, 30, 5, 10, 1000])
+
+    # USD 100 takes the 100 band and USD 30 the 50-20 band. USD 5 only fits the 10-1 band (31.0),
+    # which CashChanger beats at 1.28 SGD x 25.0 = 32.0
+    assert best.denomination.tolist()[:3] == ['100', '50-20', '']
+    assert best.source.tolist() == ['Grand Superrich', 'Grand Superrich', 'CashChanger', 'CashChanger', '']
+    assert best.rate[:4] == pytest.approx([33.0, 32.5, 32.0, 1.49 * 25.0])
+    assert best.total[0] == pytest.approx(3300.0)
+    assert math.isnan(best.rate[4]) and math.isnan(best.total[4])   # no KRW quote
+
+
+def test_convert_sell_side_takes_the_lowest_rate(calculator):
+    calculator.update(results())
+    best = calculator.convert(['USD'], [100], side=SELL)
+    assert best.source[0] == 'CashChanger'
+    assert best.rate[0] == pytest.approx(1.30 * 25.0)
+
+
+def test_convert_broadcasts_a_single_amount(calculator):
+    calculator.update(results())
+    assert calculator.convert(['USD', 'EUR'], 10).amount.tolist() == [10.0, 10.0]
+    with pytest.raises(ValueError):
+        calculator.convert(['USD', 'EUR'], [1, 2, 3])
+
+
+def test_convert_before_any_update_is_nan(calculator):
+    assert np.isnan(calculator.convert(['USD'], [100]).rate).all()
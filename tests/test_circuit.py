@@ -0,0 +1,98 @@
+import pytest
+
+import circuit
+from circuit import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def no_jitter(monkeypatch):
+    monkeypatch.setattr(circuit.random, 'uniform', lambda low, high: 1.0)
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker('Test', failure_threshold=3, base_open=30, max_open=100, clock=clock)
+
+
+def fail(breaker, times=1):
+    for _ in range(times):
+        assert breaker.allow()
+        breaker.record_failure()
+
+
+def test_opens_after_the_threshold(breaker):
+    fail(breaker, 2)
+    assert breaker.state == CLOSED
+    fail(breaker)
+    assert breaker.state == OPEN and breaker.open_until == 30
+    assert not breaker.allow()
+
+
+def test_success_resets_the_failure_count(breaker):
+    fail(breaker, 2)
+    breaker.record_success()
+    fail(breaker, 2)
+    assert breaker.state == CLOSED
+
+
+def test_half_open_lets_a_single_probe_through(breaker, clock):
+    fail(breaker, 3)
+    clock.now = 29.9
+    assert not breaker.allow()
+    clock.now = 30
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+
+def test_failed_probe_reopens_for_twice_as_long(breaker, clock):
+    fail(breaker, 3)
+    clock.now = 30
+    fail(breaker)
+    assert breaker.state == OPEN and breaker.open_until == 30 + 60
+    clock.now = 90
+    fail(breaker)
+    assert breaker.open_until == 90 + 100          # capped at max_open
+
+
+def test_successful_probe_closes_the_circuit(breaker, clock):
+    fail(breaker, 3)
+    clock.now = 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow() and breaker.allow()
+    # The next trip starts from the base open period again
+    fail(breaker, 3)
+    assert breaker.open_until == clock.now + 30
+
+
+def test_call_short_circuits_while_open(breaker):
+    calls = []
+    for _ in range(3):
+        breaker.call(lambda: calls.append(1), is_failure=lambda result: True)
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: calls.append(1))
+    assert len(calls) == 3
+
+
+def test_call_counts_exceptions_as_failures(breaker):
+    def boom():
+        raise RuntimeError('upstream down')
+
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            breaker.call(boom)
+    assert breaker.state == OPEN
@@ -0,0 +1,11 @@
+import pytest
+
+import cli
+
+
+@pytest.mark.parametrize('argv', [['fetch', '--sources', 'Foo'], ['best', 'USD', '100', '--sources', 'CashChanger', 'Foo']])
+def test_unknown_sources_are_a_usage_error(argv, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main(argv)
+    assert exit_info.value.code == 2
+    assert "unknown source(s): 'Foo'" in capsys.readouterr().err
@@ -0,0 +1,71 @@
+import math
+
+import pytest
+
+from calculator import CrossRateCalculator
+from records import RateBatch, RateRecord
+from scraper import CurrencyRateScraper
+
+QUOTES = {'CashChanger': 'SGD', 'Grand Superrich': 'THB'}
+
+
+@pytest.fixture
+def scraper():
+    return CurrencyRateScraper(session=object(), calculator=CrossRateCalculator(QUOTES))
+
+
+def cashchanger():
+    return RateBatch.from_records([
+        RateRecord('CashChanger', 'USD', 1.28, 1.30),
+        RateRecord('CashChanger', 'EUR', 1.49, 1.49),
+    ])
+
+
+def grand_superrich():
+    return RateBatch.from_records([
+        RateRecord('Grand Superrich', 'SGD', 25.0, 25.3, '100'),
+        RateRecord('Grand Superrich', 'USD', 32.9, 33.1, '100'),
+    ])
+
+
+def by_source(df, source, currency):
+    return df[(df['Source'] == source) & (df['Code'] == currency)].iloc[0]
+
+
+def test_cross_rate_columns(scraper):
+    df = scraper.combine_data(cashchanger(), grand_superrich())
+
+    assert df.attrs['bridge_rate'] == 25.0
+    assert {'Code', 'THB Buy', 'THB Sell', 'Spread', 'Best'} <= set(df.columns)
+    assert df['Code'].tolist() == df['Currency'].str[:3].tolist()
+
+    usd_cc = by_source(df, 'CashChanger', 'USD')
+    assert usd_cc['THB Buy'] == pytest.approx(1.28 * 25.0)
+    assert usd_cc['THB Sell'] == pytest.approx(1.30 * 25.0)
+    assert usd_cc['Spread'] == pytest.approx(0.02)
+
+    usd_gs = by_source(df, 'Grand Superrich', 'USD')
+    assert usd_gs['THB Buy'] == pytest.approx(32.9)
+    assert usd_gs['Currency'] == 'USD 100'
+    assert usd_gs['Spread'] == pytest.approx(0.2)
+
+    # Best: highest THB Buy per code
+    assert usd_gs['Best'] and not usd_cc['Best']
+    assert by_source(df, 'CashChanger', 'EUR')['Best']
+
+
+def test_missing_bridge_rate_gives_nan(scraper):
+    df = scraper.combine_data(cashchanger())
+
+    assert math.isnan(df.attrs['bridge_rate'])
+    assert df['THB Buy'].isna().all() and df['THB Sell'].isna().all()
+    assert not df['Best'].any()
+    assert by_source(df, 'CashChanger', 'USD')['Spread'] == pytest.approx(0.02)
+
+
+def test_dataframes_and_empty_inputs(scraper):
+    df = scraper.combine_data(cashchanger().to_frame(), grand_superrich().to_frame())
+    assert by_source(df, 'CashChanger', 'EUR')['THB Buy'] == pytest.approx(1.49 * 25.0)
+    assert (df.loc[df['Source'] == 'CashChanger', 'Denomination'] == '').all()
+
+    assert scraper.combine_data(None, RateBatch()).empty
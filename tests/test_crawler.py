@@ -0,0 +1,123 @@
+import datetime as dt
+import threading
+
+import requests
+
+import crawler
+from crawler import CHANGER_PAGE, CURRENCY_PAGE, LANDING, CashChangerCrawler, normalize_url, parse_board_page
+
+LANDING_PAGE = b'''<html><body>
+<script>var s = "USD 1 = SGD 9.9999";</script>
+<div class="rate-card changer" data-id="7"><h3 class="changer-name">Arcade Exchange</h3>
+  <div class="quote">USD 1 = SGD 1.2900</div><div class="quote">JPY 1000 = SGD 8.7150</div></div>
+<div class="rate-card changer" data-id="9"><h3 class="changer-name">Lucky Plaza FX</h3>
+  <div class="quote">USD 1 = SGD 1.2850</div></div>
+<a href="/singapore/changer/7">Arcade</a> <a href="/singapore/changer/7/#rates">Arcade</a>
+<a href="/singapore/usd">USD</a> <a href="/singapore/usd/">USD</a> <a href="/singapore/jpy#top">JPY</a>
+<a href="/singapore/faq">FAQ</a> <a href="/singapore/app">App</a>
+<a href="https://elsewhere.example/singapore/usd">Other site</a>
+</body></html>'''
+
+CHANGER_7 = b'''<html><body><h1>Arcade Exchange Pte Ltd</h1>
+<p>USD 1 = SGD 1.2800</p><p>EUR 1 = SGD 1.4500</p></body></html>'''
+
+USD_PAGE = b'''<html><body>
+<div class="rate-card changer" data-id="7"><h3 class="changer-name">Arcade</h3><span>USD 1 = SGD 1.2870</span></div>
+<div class="rate-card changer" data-id="9"><h3 class="changer-name">Lucky Plaza</h3><span>USD 1 = SGD 1.2840</span></div>
+</body></html>'''
+
+
+def test_landing_page_rows_and_links():
+    rows, links = parse_board_page(LANDING_PAGE, 'https://cashchanger.co/singapore')
+    assert rows == [
+        ('7', 'Arcade Exchange', 'USD', 1.29, LANDING),
+        ('7', 'Arcade Exchange', 'JPY', 0.008715, LANDING),
+        ('9', 'Lucky Plaza FX', 'USD', 1.285, LANDING),
+    ]
+    assert links.count('https://cashchanger.co/singapore/usd') == 2
+    assert 'https://cashchanger.co/singapore/jpy' in links
+    assert 'https://cashchanger.co/singapore/changer/7' in links
+
+
+def test_changer_page_without_cards_uses_its_heading():
+    rows, _ = parse_board_page(CHANGER_7, 'https://cashchanger.co/singapore/changer/7')
+    assert rows == [
+        ('7', 'Arcade Exchange Pte Ltd', 'USD', 1.28, CHANGER_PAGE),
+        ('7', 'Arcade Exchange Pte Ltd', 'EUR', 1.45, CHANGER_PAGE),
+    ]
+
+
+def test_currency_page_priority():
+    rows, _ = parse_board_page(USD_PAGE, 'https://cashchanger.co/singapore/usd/')
+    assert {row[4] for row in rows} == {CURRENCY_PAGE}
+
+
+def test_normalize_url():
+    assert normalize_url('HTTPS://CashChanger.co/singapore/usd/#top') == 'https://cashchanger.co/singapore/usd'
+    assert normalize_url('https://cashchanger.co/') == 'https://cashchanger.co/'
+
+
+class PageClient:
+    """Blocking client over a {url: body} dict, recording fetched URLs"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.fetched = []
+
+    def get(self, url, timeout=None):
+        self.fetched.append(url)
+        response = requests.Response()
+        response.url = url
+        response.status_code = 200 if url in self.pages else 404
+        response._content = self.pages.get(url, b'')
+        response.elapsed = dt.timedelta(0)
+        return response
+
+
+def crawl(pages):
+    client = PageClient(pages)
+    board = CashChangerCrawler(start_url='https://cashchanger.co/singapore', host_interval=0,
+                               client=client).crawl()
+    return board, client
+
+
+def test_crawl_merges_pages_by_specificity():
+    board, client = crawl({
+        'https://cashchanger.co/singapore': LANDING_PAGE,
+        'https://cashchanger.co/singapore/changer/7': CHANGER_7,
+        'https://cashchanger.co/singapore/usd': USD_PAGE,
+    })
+
+    assert sorted(client.fetched) == [
+        'https://cashchanger.co/singapore',
+        'https://cashchanger.co/singapore/changer/7',
+        'https://cashchanger.co/singapore/jpy',
+        'https://cashchanger.co/singapore/usd',
+    ]
+    assert board.pages == 3 and board.errors == 1          # jpy is a 404
+    # Names come from the landing cards; rates from the most specific page
+    assert board.changers() == ['Arcade Exchange', 'Lucky Plaza FX']
+    assert board.rate('Arcade Exchange', 'USD') == 1.28     # changer page beats currency page and landing
+    assert board.rate('Lucky Plaza FX', 'USD') == 1.284     # currency page beats landing
+    assert board.rate('Arcade Exchange', 'EUR') == 1.45
+    assert board.best_changers()['USD'].source == 'Arcade Exchange'
+
+
+def test_pages_are_not_parsed_on_the_event_loop(monkeypatch):
+    threads = []
+
+    def recording_parse(content, url):
+        threads.append(threading.get_ident())
+        return parse_board_page(content, url)
+
+    monkeypatch.setattr(crawler, 'parse_board_page', recording_parse)
+    loop_thread = []
+    crawl_on_loop = CashChangerCrawler.acrawl
+
+    async def acrawl(self):
+        loop_thread.append(threading.get_ident())
+        return await crawl_on_loop(self)
+
+    monkeypatch.setattr(CashChangerCrawler, 'acrawl', acrawl)
+    crawl({'https://cashchanger.co/singapore': LANDING_PAGE})
+    assert threads and loop_thread[0] not in threads
@@ -0,0 +1,64 @@
+import pandas as pd
+
+from history import RateHistory
+from records import RateBatch, RateRecord
+
+DAY = pd.Timestamp('2024-11-05T00:00:00Z')
+
+
+def batch(source, currency, buy, denomination=''):
+    return RateBatch.from_records([RateRecord(source, currency, buy, buy + 0.1, denomination)])
+
+
+def test_two_writers_share_symbol_ids(tmp_path):
+    daemon, streamlit = RateHistory(str(tmp_path)), RateHistory(str(tmp_path))
+
+    daemon.append(batch('CashChanger', 'USD', 1.28), DAY + pd.Timedelta(minutes=1))
+    streamlit.append(batch('Grand Superrich', 'SGD', 25.1, '100'), DAY + pd.Timedelta(minutes=2))
+    daemon.append(batch('Superrich Thailand', 'EUR', 37.7, '500'), DAY + pd.Timedelta(minutes=3))
+
+    for reader in (daemon, streamlit, RateHistory(str(tmp_path))):
+        df = reader.range(DAY, DAY + pd.Timedelta(hours=1))
+        assert list(zip(df['Source'], df['Currency'], df['Denomination'])) == [
+            ('CashChanger', 'USD', ''),
+            ('Grand Superrich', 'SGD', '100'),
+            ('Superrich Thailand', 'EUR', '500'),
+        ]
+
+
+def test_out_of_order_appends_stay_sorted(tmp_path):
+    history = RateHistory(str(tmp_path))
+    history.append(batch('CashChanger', 'USD', 1.30), DAY + pd.Timedelta(minutes=30))
+    history.append(batch('CashChanger', 'USD', 1.10), DAY + pd.Timedelta(minutes=10))
+    history.append(batch('CashChanger', 'USD', 1.20), DAY + pd.Timedelta(minutes=20))
+
+    df = history.range(DAY + pd.Timedelta(minutes=15), DAY + pd.Timedelta(minutes=25))
+    assert df['Buy Rate'].tolist() == [1.20]
+    assert history.as_of(DAY + pd.Timedelta(minutes=25))['Buy Rate'].tolist() == [1.20]
+    assert history.range(DAY, DAY + pd.Timedelta(hours=1))['Timestamp'].is_monotonic_increasing
+
+
+def _append_many(root, source, start):
+    history = RateHistory(root)
+    for i in range(40):
+        history.append(batch(source, f'C{i % 7}', 1.0 + i), start + pd.Timedelta(seconds=i))
+
+
+def test_concurrent_writer_processes(tmp_path):
+    import multiprocessing
+
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=_append_many, args=(str(tmp_path), source, DAY))
+               for source in ('CashChanger', 'Grand Superrich')]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+        assert worker.exitcode == 0
+
+    df = RateHistory(str(tmp_path)).range(DAY, DAY + pd.Timedelta(hours=1))
+    assert len(df) == 80
+    assert df['Timestamp'].is_monotonic_increasing
+    for source in ('CashChanger', 'Grand Superrich'):
+        rows = df[df['Source'] == source].sort_values('Buy Rate')
+        assert rows['Currency'].tolist() == [f'C{i % 7}' for i in range(40)]
@@ -0,0 +1,86 @@
+import datetime as dt
+import os
+
+import requests
+
+from conftest import FIXTURES
+from http_client import clear_page_states, fetch_if_changed, rate_fingerprint
+from records import RateBatch, RateRecord
+
+PAGE = (b'<html><script>var token = "a1b2.99";</script><body data-session="%s">'
+        b'<p>updated %s min ago at 12:%s</p><table>'
+        b'<tr><td>%s</td><td>%s</td><td>25.20</td></tr></table></body></html>')
+
+
+def page(currency=b'SGD 100', buy=b'25.05', session=b'123.45', minutes=b'3', clock=b'01'):
+    return PAGE % (session, minutes, clock, currency, buy)
+
+
+def test_rate_changes_are_detected():
+    base = rate_fingerprint(page())
+    assert rate_fingerprint(page(buy=b'25.10')) != base
+    assert rate_fingerprint(page(buy=b'25')) != base                  # integer rate
+    assert rate_fingerprint(page(currency=b'MYR 100')) != base        # currency code
+    assert rate_fingerprint(page(currency=b'SGD 50')) != base         # denomination
+
+
+def test_volatile_text_and_markup_are_ignored():
+    base = rate_fingerprint(page())
+    assert rate_fingerprint(page(session=b'987.65', minutes=b'17', clock=b'45')) == base
+
+
+def test_fixture_fingerprint_is_stable():
+    with open(os.path.join(FIXTURES, 'cashchanger_singapore.html'), 'rb') as f:
+        content = f.read()
+    assert rate_fingerprint(content) == rate_fingerprint(content.replace(b'updated 4 min ago', b'updated 9 min ago'))
+    assert rate_fingerprint(content) != rate_fingerprint(content.replace(b'SGD 1.2809', b'SGD 1.2810', 1))
+
+
+class ScriptedSession:
+    """Answers GETs with the scripted (status, body, etag) responses in order, recording request headers"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.sent = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.sent.append(dict(headers or {}))
+        status, body, etag = self.responses.pop(0)
+        response = requests.Response()
+        response.status_code = status
+        response.url = url
+        response._content = body
+        response.headers['ETag'] = etag
+        response.elapsed = dt.timedelta(0)
+        return response
+
+
+def parse_rates(response):
+    return RateBatch.from_records(RateRecord('Test', currency, 1.0, 1.1)
+                                  for currency in response.content.decode().split())
+
+
+def test_validators_of_an_empty_parse_are_not_kept():
+    clear_page_states()
+    session = ScriptedSession((200, b'USD EUR', '"v1"'), (200, b'', '"v2"'), (200, b'USD', '"v3"'))
+    url = 'http://rates.test/validators'
+
+    first, changed = fetch_if_changed(url, parse_rates, session=session)
+    assert changed and len(first) == 2
+    empty, changed = fetch_if_changed(url, parse_rates, session=session)
+    assert changed and empty.empty
+    # The next poll still revalidates against v1, so a 304 can't revive v1 for the v2 page
+    third, changed = fetch_if_changed(url, parse_rates, session=session)
+    assert session.sent[2]['If-None-Match'] == '"v1"'
+    assert changed and third.currency.tolist() == ['USD']
+
+
+def test_not_modified_returns_the_previous_result():
+    clear_page_states()
+    session = ScriptedSession((200, b'USD', '"v1"'), (304, b'', '"v1"'))
+    url = 'http://rates.test/not-modified'
+
+    first, _ = fetch_if_changed(url, parse_rates, session=session)
+    again, changed = fetch_if_changed(url, parse_rates, session=session)
+    assert session.sent[1]['If-None-Match'] == '"v1"'
+    assert again is first and not changed
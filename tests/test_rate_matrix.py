@@ -0,0 +1,78 @@
+import json
+import math
+import os
+
+import pytest
+
+import superrich
+from conftest import FIXTURES
+from rate_matrix import BUY, SELL, RateMatrix, note_range
+from records import RateBatch, RateRecord
+
+
+@pytest.fixture
+def superrich_batch():
+    with open(os.path.join(FIXTURES, 'superrich_rates.json'), encoding='utf-8') as f:
+        return superrich.parse_rate_payload(json.load(f))
+
+
+@pytest.fixture
+def matrix(superrich_batch):
+    # A second THB source without bands, cheaper to buy USD from than every Superrich band
+    other = RateBatch.from_records([RateRecord('Other', 'USD', 31.9, 32.20)])
+    return RateMatrix.from_batches([superrich_batch, other])
+
+
+@pytest.mark.parametrize('denomination, expected', [
+    ('100', (100, 100)),
+    ('50-20', (20, 50)),
+    ('10000-1000', (1000, 10000)),
+    ('1,000-100', (100, 1000)),
+    ('', (0, math.inf)),
+])
+def test_note_range(denomination, expected):
+    assert note_range(denomination) == expected
+
+
+def test_amounts_only_use_bands_they_cover(matrix):
+    best = matrix.best_for_amounts('USD', [100, 30, 5])
+    assert best.denomination.tolist() == ['100', '50-20', '']
+    assert best.source.tolist() == ['Superrich Thailand', 'Superrich Thailand', 'Other']
+    assert best.rate.tolist() == [32.24, 32.1, 31.9]
+    assert best.total.tolist() == pytest.approx([3224.0, 963.0, 159.5])
+
+
+def test_small_amounts_are_not_eligible_for_large_note_bands(matrix):
+    best = matrix.best_for_amounts('SGD', [50, 100])
+    assert best.denomination.tolist() == ['50-2', '1000-100']
+    assert best.rate.tolist() == [24.9, 25.05]
+
+
+def test_amount_below_every_band_has_no_quote(matrix):
+    best = matrix.best_for_amounts('JPY', [500])
+    assert best.source.tolist() == [''] and math.isnan(best.rate[0]) and math.isnan(best.total[0])
+
+
+def test_sell_side_takes_the_lowest_rate(matrix):
+    best = matrix.best_for_amounts('USD', [100], side=SELL)
+    assert best.source[0] == 'Other' and best.rate[0] == 32.20
+
+
+def test_other_quote_currencies_are_not_compared(superrich_batch):
+    sgd_quoted = RateBatch.from_records([RateRecord('CashChanger', 'USD', 1.28, 1.30)])
+    matrix = RateMatrix.from_batches([superrich_batch, sgd_quoted], {'CashChanger': 'SGD'})
+    assert matrix.best_for_amounts('USD', [100]).source[0] == 'Superrich Thailand'
+    assert matrix.best_for_amounts('USD', [100], quote_currency='SGD').source[0] == 'CashChanger'
+
+
+def test_lookup_without_denomination_uses_the_largest_notes(matrix):
+    assert matrix.rate('Superrich Thailand', 'USD') == 32.24
+    assert matrix.rate('Superrich Thailand', 'SGD') == 25.05
+    assert matrix.rate('Superrich Thailand', 'USD', '10-1', side=BUY) == 31.5
+    assert math.isnan(matrix.rate('Superrich Thailand', 'KRW'))
+
+
+def test_best_rates_per_currency(matrix):
+    best = matrix.best_rates()
+    assert (best['USD'].source, best['USD'].denomination) == ('Superrich Thailand', '100')
+    assert best['SGD'].denomination == '1000-100'
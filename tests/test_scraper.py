@@ -0,0 +1,105 @@
+import datetime as dt
+import itertools
+
+import pytest
+import requests
+
+import scraper as scraper_module
+import sources as sources_module
+from circuit import CircuitBreaker
+from calculator import CrossRateCalculator
+from records import RateBatch, RateRecord
+from scraper import CurrencyRateScraper
+from sources import BROWSER, Source
+
+_urls = itertools.count()
+
+
+class FakeSession:
+    """Answers every GET with the next status code, counting the calls"""
+
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+        self.calls = 0
+
+    def get(self, url, headers=None, timeout=None):
+        self.calls += 1
+        status = self.statuses[min(self.calls, len(self.statuses)) - 1]
+        if status is None:
+            raise requests.ConnectionError('connection refused')
+        response = requests.Response()
+        response.status_code = status
+        response.url = url
+        response._content = b'<p>USD 1.2800 1.2900</p>'
+        response.elapsed = dt.timedelta(0)
+        return response
+
+
+def parse(content):
+    return RateBatch.from_records([RateRecord('Test', 'USD', 1.28, 1.29)])
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(scraper_module.time, 'sleep', lambda seconds: None)
+
+
+def source(retries=2):
+    # A fresh URL per test: fetch_if_changed keeps validators per URL
+    return Source(name='Test', url=f'http://rates.test/{next(_urls)}', parse=parse, retries=retries)
+
+
+def scraper_with(session):
+    return CurrencyRateScraper(session=session, calculator=CrossRateCalculator({}))
+
+
+@pytest.mark.parametrize('status', [403, 404])
+def test_client_errors_are_not_retried(status):
+    session = FakeSession(status)
+    assert scraper_with(session).scrape_source(source()).empty
+    assert session.calls == 1
+
+
+@pytest.mark.parametrize('first', [None, 429, 503])
+def test_transient_errors_are_retried(first):
+    session = FakeSession(first, 200)
+    batch = scraper_with(session).scrape_source(source())
+    assert session.calls == 2
+    assert [(r.currency, r.buy) for r in batch] == [('USD', 1.28)]
+
+
+def test_retries_are_bounded():
+    session = FakeSession(503)
+    assert scraper_with(session).scrape_source(source(retries=2)).empty
+    assert session.calls == 3
+
+
+def test_guarded_source_serves_last_good_when_loader_raises(monkeypatch):
+    scraper = scraper_with(FakeSession(200))
+    good = RateBatch.from_records([RateRecord('Flaky', 'USD', 32.9, 33.1)])
+    results = iter([good])
+
+    def loader():
+        try:
+            return next(results)
+        except StopIteration:
+            raise RuntimeError('browser crashed') from None
+
+    monkeypatch.setattr(scraper, 'recorded_source', lambda name: loader)
+    monkeypatch.setattr(scraper_module, 'get_breaker', lambda name: CircuitBreaker(name))
+    guarded = scraper.guarded_source('Flaky')
+
+    assert guarded() is good
+    stale = guarded()
+    assert stale.attrs['stale'] and [(r.currency, r.buy) for r in stale] == [('USD', 32.9)]
+
+
+def test_custom_sources_are_rate_limited(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(sources_module.time, 'sleep', sleeps.append)
+    browser = Source(name=f'Browser {next(_urls)}', url='http://rates.test/', mode=BROWSER,
+                     fetch=lambda: [RateRecord('Browser', 'USD', 32.9, 33.1)], rate_limit=30)
+
+    assert len(CurrencyRateScraper.fetch_custom(browser)) == 1
+    CurrencyRateScraper.fetch_custom(browser)
+    assert len(sleeps) == 1 and 29 < sleeps[0] <= 30
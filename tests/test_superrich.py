@@ -0,0 +1,72 @@
+import json
+import os
+
+import pytest
+
+import superrich
+from conftest import FIXTURES, ROOT
+
+
+@pytest.fixture
+def payload():
+    with open(os.path.join(FIXTURES, 'superrich_rates.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def sample_html():
+    with open(os.path.join(ROOT, 'sample.html'), encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(superrich.time, 'sleep', lambda seconds: None)
+
+
+def fail(*args, **kwargs):
+    raise ConnectionError('unreachable')
+
+
+def test_api_payload(payload):
+    batch = superrich.scrape_superrich_thailand(
+        mode='api', api_url='http://api.test/rates',
+        fetch_api=lambda url: superrich.parse_rate_payload(payload), render_page=fail,
+    )
+    usd = {r.denomination: (r.buy, r.sell) for r in batch if r.currency == 'USD'}
+    assert usd == {'100': (32.24, 32.27), '50-20': (32.10, 32.27), '10-1': (31.50, 32.27)}
+    assert set(batch.source.tolist()) == {superrich.SOURCE}
+
+
+def test_auto_falls_back_to_browser_html(sample_html):
+    calls = []
+
+    def render(url):
+        calls.append(url)
+        return sample_html
+
+    batch = superrich.scrape_superrich_thailand(mode='auto', api_url='http://api.test/rates',
+                                                fetch_api=fail, render_page=render)
+    assert len(calls) == 1
+    assert ('USD', 32.24, 32.27) in [(r.currency, r.buy, r.sell) for r in batch]
+
+
+def test_auto_without_api_url_skips_api(sample_html):
+    batch = superrich.scrape_superrich_thailand(mode='auto', api_url=None,
+                                                fetch_api=fail, render_page=lambda url: sample_html)
+    assert not batch.empty
+
+
+def test_api_mode_without_url_is_empty():
+    assert superrich.scrape_superrich_thailand(mode='api', api_url=None, fetch_api=fail, render_page=fail).empty
+
+
+def test_browser_retries_then_gives_up():
+    attempts = []
+
+    def render(url):
+        attempts.append(url)
+        raise TimeoutError('table never rendered')
+
+    batch = superrich.scrape_superrich_thailand(mode='browser', retries=3, fetch_api=fail, render_page=render)
+    assert batch.empty and len(attempts) == 3